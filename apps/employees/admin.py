@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Employee
+from .models import APIClient, Employee
 
 
 @admin.register(Employee)
@@ -24,3 +24,22 @@ class EmployeeAdmin(admin.ModelAdmin):
 
     is_admin.boolean = True
     is_admin.short_description = "Admin Status"
+
+
+@admin.register(APIClient)
+class APIClientAdmin(admin.ModelAdmin):
+    """Deactivate or inspect API clients; keys are issued by create_api_client"""
+
+    list_display = ["name", "key_prefix", "is_active", "request_count", "last_used_at"]
+    list_filter = ["is_active"]
+    search_fields = ["name", "key_prefix"]
+    readonly_fields = [
+        "key_prefix",
+        "key_hash",
+        "request_count",
+        "last_used_at",
+        "created_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
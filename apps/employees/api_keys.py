@@ -0,0 +1,238 @@
+"""
+API client keys for the X-API-Key endpoints
+
+Each calling service has its own APIClient and key. A key is found by its
+prefix and checked by comparing SHA-256 digests in constant time. Keys are
+random, so a fast hash is enough. Clients are cached in-process for
+API_CLIENT_CACHE_TTL seconds, so revoking a key takes at most that long to
+reach other processes. Unknown prefixes are remembered briefly in a separate,
+smaller cache, so random keys cannot push real clients out. Request counts
+are kept in memory and written by a background thread in one UPDATE per
+batch.
+"""
+
+import atexit
+import hashlib
+import hmac
+import logging
+import secrets
+import string
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .cache import LRUCache
+from .database import live_database_name
+from .models import APIClient
+
+logger = logging.getLogger(__name__)
+
+PREFIX_BYTES = 6
+
+
+@dataclass(frozen=True)
+class ClientIdentity:
+    """The authenticated caller, kept on request.api_client"""
+
+    id: Optional[int]
+    name: str
+    key_hash: str
+
+
+# ADMIN_API_KEY still works while services move to their own keys
+LEGACY_CLIENT = ClientIdentity(id=None, name="admin-api-key", key_hash="")
+
+# Prefix -> ClientIdentity of an active client
+api_client_local_cache = LRUCache(
+    maxsize=settings.API_CLIENT_CACHE_SIZE, ttl=settings.API_CLIENT_CACHE_TTL
+)
+# Prefixes of no active client
+api_client_negative_cache = LRUCache(
+    maxsize=settings.API_CLIENT_NEGATIVE_CACHE_SIZE,
+    ttl=settings.API_CLIENT_NEGATIVE_CACHE_TTL,
+)
+
+
+def generate_api_key():
+    """A new (prefix, key) pair; the key is shown to its owner only once"""
+    prefix = secrets.token_hex(PREFIX_BYTES)
+    return prefix, f"{prefix}.{secrets.token_urlsafe(32)}"
+
+
+def hash_api_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _load_identity(prefix):
+    client = (
+        APIClient.objects.filter(key_prefix=prefix, is_active=True)
+        .values("id", "name", "key_hash")
+        .first()
+    )
+    return ClientIdentity(**client) if client else None
+
+
+async def _aload_identity(prefix):
+    client = (
+        await APIClient.objects.filter(key_prefix=prefix, is_active=True)
+        .values("id", "name", "key_hash")
+        .afirst()
+    )
+    return ClientIdentity(**client) if client else None
+
+
+def _check_legacy_key(key):
+    legacy = settings.ADMIN_API_KEY
+    if legacy and hmac.compare_digest(key.encode(), legacy.encode()):
+        return LEGACY_CLIENT
+    return None
+
+
+def _split_prefix(key):
+    prefix, dot, _ = key.partition(".")
+    if not dot or len(prefix) != 2 * PREFIX_BYTES:
+        return None
+    return prefix if set(prefix) <= set(string.hexdigits) else None
+
+
+def _match(identity, key):
+    if identity is None:
+        return None
+    if hmac.compare_digest(hash_api_key(key), identity.key_hash):
+        return identity
+    return None
+
+
+def _cache_identity(prefix, identity):
+    if identity is None:
+        api_client_negative_cache.set(prefix, True)
+    else:
+        api_client_local_cache.set(prefix, identity)
+
+
+def authenticate_api_key(key):
+    """The ClientIdentity an X-API-Key value belongs to, or None"""
+    if not key:
+        return None
+
+    prefix = _split_prefix(key)
+    if prefix is None:
+        return _check_legacy_key(key)
+
+    identity = api_client_local_cache.get(prefix)
+    if identity is None and not api_client_negative_cache.get(prefix):
+        identity = _load_identity(prefix)
+        _cache_identity(prefix, identity)
+    return _match(identity, key) or _check_legacy_key(key)
+
+
+async def aauthenticate_api_key(key):
+    """authenticate_api_key() for async views"""
+    if not key:
+        return None
+
+    prefix = _split_prefix(key)
+    if prefix is None:
+        return _check_legacy_key(key)
+
+    identity = api_client_local_cache.get(prefix)
+    if identity is None and not api_client_negative_cache.get(prefix):
+        identity = await _aload_identity(prefix)
+        _cache_identity(prefix, identity)
+    return _match(identity, key) or _check_legacy_key(key)
+
+
+def invalidate_api_client(prefix):
+    api_client_local_cache.delete(prefix)
+    api_client_negative_cache.delete(prefix)
+
+
+class APIClientStats:
+    """
+    Per-client request counters, written to the database in batches
+
+    record() is a dict increment under a lock. A daemon thread, started on
+    the first record(), writes every client's count in one UPDATE every
+    flush_interval seconds, or sooner once flush_size requests are pending,
+    and the counts are flushed at exit too. Counts are kept per database,
+    like LastLoginRecorder's, and lost only if the process is killed.
+    """
+
+    def __init__(self, flush_size, flush_interval):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def record(self, identity):
+        if identity.id is None:
+            return
+
+        with self._lock:
+            counts = self._counts.setdefault(live_database_name(), Counter())
+            counts[identity.id] += 1
+            if sum(counts.values()) >= self.flush_size:
+                self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="api-client-stats-flush", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self):
+        """Add the pending counts to APIClient.request_count; returns how many"""
+        database = live_database_name()
+        with self._lock:
+            counts = self._counts.pop(database, Counter())
+            stale = sum(sum(other.values()) for other in self._counts.values())
+            self._counts = {}
+
+        if stale:
+            logger.warning(
+                "Discarded %d API client requests counted on another database", stale
+            )
+        if not counts:
+            return 0
+
+        increments = [When(pk=pk, then=Value(count)) for pk, count in counts.items()]
+        try:
+            APIClient.objects.filter(pk__in=counts).update(
+                request_count=F("request_count") + Case(*increments, default=Value(0)),
+                last_used_at=timezone.now(),
+            )
+        except Exception:
+            with self._lock:
+                self._counts.setdefault(database, Counter()).update(counts)
+            raise
+        return sum(counts.values())
+
+    def clear(self):
+        """Forget the pending counts without writing them"""
+        with self._lock:
+            self._counts = {}
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not write API client request counts")
+            finally:
+                close_old_connections()
+
+
+api_client_stats = APIClientStats(
+    flush_size=settings.API_CLIENT_STATS_FLUSH_SIZE,
+    flush_interval=settings.API_CLIENT_STATS_FLUSH_INTERVAL,
+)
+atexit.register(api_client_stats.flush)
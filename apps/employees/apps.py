@@ -5,3 +5,11 @@ class EmployeesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.employees"
     verbose_name = "Employees"
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import database, signals  # noqa: F401
+        from .signing import install_token_backend
+
+        install_token_backend(settings)
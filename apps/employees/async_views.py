@@ -0,0 +1,284 @@
+"""
+Native async versions of the login, refresh, /me/ and verify_admin endpoints
+
+core/urls.py mounts these in place of the DRF views when ASYNC_AUTH_VIEWS is
+on. Requests and responses are the same, but queries go through Django's
+async ORM and password hashing runs in the bounded pool from hashing.py, so
+under an ASGI server slow logins cannot hold up verification traffic.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    MethodNotAllowed,
+    NotAuthenticated,
+    Throttled,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt import exceptions as jwt_exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .api_keys import aauthenticate_api_key, api_client_stats
+from .cache import aget_admin_status
+from .conditional import (
+    VALIDATOR_FIELDS,
+    get_not_modified_response,
+    is_conditional_request,
+    set_validator_headers,
+)
+from .database import ause_replica, request_routing
+from .hashing import acheck_password
+from .last_login import last_login_recorder
+from .metrics import record_time
+from .models import Employee
+from .revocation import ais_revoked, arevoke
+from .serializers import (
+    CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
+    EmployeeSerializer,
+    get_employee_claims,
+    refreshed_token_data,
+)
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, VerifyAdminThrottle
+
+jwt_authentication = JWTAuthentication()
+
+
+def _json_response(data, status=status.HTTP_200_OK):
+    # Render like DRF's Response so both view stacks return identical bodies
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, content_type="application/json"
+    )
+
+
+def _error_response(request, exc):
+    """The response DRF's exception handler builds for an APIException"""
+    if isinstance(exc.detail, (dict, list)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+
+    response = _json_response(data, status=exc.status_code)
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        response["WWW-Authenticate"] = jwt_authentication.authenticate_header(request)
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = "%d" % exc.wait
+    return response
+
+
+def async_api_view(methods):
+    """
+    Allow only the given methods, skip CSRF and render DRF exceptions
+
+    The view gets a DRF Request, which parses JSON and form bodies into
+    request.data and is what throttle classes expect.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+                request = Request(
+                    request,
+                    parsers=[
+                        parser() for parser in drf_settings.DEFAULT_PARSER_CLASSES
+                    ],
+                )
+                with request_routing():
+                    return await view(request, *args, **kwargs)
+            except TokenError as exc:
+                return _error_response(request, InvalidToken(exc.args[0]))
+            except APIException as exc:
+                return _error_response(request, exc)
+
+        # django.views.decorators.csrf.csrf_exempt wraps views in a sync
+        # function in Django 4.2, so mark the async view directly
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
+
+
+def _request_data(request):
+    """Parsed body, or an empty dict when it is not a JSON object or form"""
+    data = request.data
+    return data if isinstance(data, dict) else {}
+
+
+@sync_to_async
+def _check_throttles(request, throttle_classes):
+    """APIView.check_throttles(), in a thread as cache backends may block"""
+    durations = []
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, None):
+            durations.append(throttle.wait())
+
+    durations = [duration for duration in durations if duration is not None]
+    if durations:
+        raise Throttled(max(durations))
+
+
+def _authenticate(request):
+    """Validated access token from the Authorization header"""
+    header = jwt_authentication.get_header(request)
+    raw_token = None if header is None else jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        raise NotAuthenticated()
+
+    token = jwt_authentication.get_validated_token(raw_token)
+    if api_settings.USER_ID_CLAIM not in token:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+    return token
+
+
+def _check_token_user(token, user):
+    """The user checks JWTAuthentication.get_user() makes, for a loaded user"""
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise jwt_exceptions.AuthenticationFailed(
+            _("User is inactive"), code="user_inactive"
+        )
+
+    if api_settings.CHECK_REVOKE_TOKEN and token.get(
+        api_settings.REVOKE_TOKEN_CLAIM
+    ) != get_md5_hash_password(user.password):
+        raise jwt_exceptions.AuthenticationFailed(
+            _("The user's password has been changed."), code="password_changed"
+        )
+
+
+@async_api_view(["POST"])
+async def login(request):
+    """Async CustomTokenObtainPairView"""
+    await _check_throttles(request, [LoginIPThrottle, LoginUsernameThrottle])
+    serializer = CustomTokenObtainPairSerializer()
+    # Field validation only; validate() would authenticate synchronously
+    attrs = serializer.to_internal_value(_request_data(request))
+
+    user = (
+        await User.objects.select_related("employee")
+        .filter(**{User.USERNAME_FIELD: attrs[User.USERNAME_FIELD]})
+        .afirst()
+    )
+    if not await acheck_password(user, attrs["password"]) or not (
+        api_settings.USER_AUTHENTICATION_RULE(user)
+    ):
+        await sync_to_async(LoginUsernameThrottle().record_failure)(request)
+        raise AuthenticationFailed(
+            serializer.error_messages["no_active_account"], "no_active_account"
+        )
+
+    refresh = CustomTokenObtainPairSerializer.get_token(user)
+    data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+    data.update(get_employee_claims(user))
+
+    if api_settings.UPDATE_LAST_LOGIN:
+        await last_login_recorder.arecord(user)
+
+    return _json_response(data)
+
+
+@async_api_view(["POST"])
+async def refresh(request):
+    """Async CustomTokenRefreshView"""
+    serializer = CustomTokenRefreshSerializer()
+    attrs = serializer.to_internal_value(_request_data(request))
+
+    refresh = serializer.token_class(attrs["refresh"])
+    jti = refresh[api_settings.JTI_CLAIM]
+    if await ais_revoked(jti) or not await arevoke(jti, refresh["exp"]):
+        raise InvalidToken(_("Token is blacklisted"))
+
+    user = (
+        await User.objects.select_related("employee")
+        .filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)})
+        .afirst()
+    )
+    if not api_settings.USER_AUTHENTICATION_RULE(user):
+        raise AuthenticationFailed(
+            serializer.error_messages["no_active_account"], "no_active_account"
+        )
+
+    return _json_response(refreshed_token_data(refresh, user))
+
+
+@async_api_view(["GET"])
+async def me(request):
+    """Async EmployeeViewSet.me, checking the token user from the joined row"""
+    token = _authenticate(request)
+    user_id = token[api_settings.USER_ID_CLAIM]
+    await ause_replica(user_id)
+    employees = Employee.objects.select_related("user")
+
+    try:
+        if is_conditional_request(request):
+            stamp = await employees.only(
+                *VALIDATOR_FIELDS, "user__is_active", "user__password"
+            ).aget(user_id=user_id)
+            _check_token_user(token, stamp.user)
+            not_modified = get_not_modified_response(request, stamp)
+            if not_modified is not None:
+                return not_modified
+
+        employee = await employees.aget(user_id=user_id)
+    except Employee.DoesNotExist:
+        user = await User.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).afirst()
+        if user is None:
+            raise jwt_exceptions.AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        _check_token_user(token, user)
+        return _json_response(
+            {"error": "Employee profile not found"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    _check_token_user(token, employee.user)
+    with record_time("serializer"):
+        data = EmployeeSerializer(employee).data
+    return set_validator_headers(_json_response(data), employee)
+
+
+@async_api_view(["POST"])
+async def verify_admin(request):
+    """Async EmployeeViewSet.verify_admin"""
+    client = await aauthenticate_api_key(request.headers.get("X-API-Key"))
+    if client is None:
+        raise NotAuthenticated()
+
+    request.api_client = client
+    api_client_stats.record(client)
+    await _check_throttles(request, [VerifyAdminThrottle])
+
+    data = _request_data(request)
+    user_id = data.get("user_id")
+    username = data.get("username")
+
+    if not user_id and not username:
+        return _json_response(
+            {"error": "user_id or username is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    result = await aget_admin_status(user_id=user_id, username=username)
+    if result is None:
+        return _json_response(
+            {"error": "Employee not found"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    return _json_response(result)
@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import LRUCache
+
+# Token digest -> TokenAuthEntry, for tokens this process has verified
+token_auth_local_cache = LRUCache(
+    maxsize=settings.TOKEN_AUTH_LOCAL_CACHE_SIZE,
+    ttl=settings.TOKEN_AUTH_LOCAL_CACHE_TTL,
+)
+
+# User id -> counter bumped by invalidate_user_tokens(); local entries
+# recorded under an older value are ignored, so one user's change drops only
+# that user's tokens
+_local_user_versions = {}
+_local_user_versions_lock = threading.Lock()
+
+# The password hash is left out of cached users and loaded on access
+USER_SNAPSHOT_FIELDS = [
+    field.attname for field in User._meta.concrete_fields if field.name != "password"
+]
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """
+    Authenticate from the signed token claims without loading the user row
+
+    Claims read from the database more than JWT_CLAIMS_MAX_AGE ago fall back
+    to the regular database lookup, which bounds how long a role change or
+    deactivation can take to apply.
+    """
+
+    def get_user(self, validated_token):
+        claims_iat = validated_token.get("claims_iat")
+        max_age = settings.JWT_CLAIMS_MAX_AGE.total_seconds()
+
+        if claims_iat is None or time.time() - claims_iat > max_age:
+            return super().get_user(validated_token)
+
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+
+def _token_key(digest):
+    return f"employees:token_auth:{digest}"
+
+
+def _user_version_key(user_id):
+    return f"employees:token_auth_version:{user_id}"
+
+
+class TokenAuthEntry:
+    """A verified token and a snapshot of its user, as cached by digest"""
+
+    def __init__(self, token, db, user_values, version=None, local_version=None):
+        self.token = token
+        self.db = db
+        self.user_values = user_values
+        self.version = version
+        if local_version is None:
+            local_version = _local_user_version(self.user_id)
+        self.local_version = local_version
+
+    @property
+    def user_id(self):
+        return self.token.get(api_settings.USER_ID_CLAIM)
+
+    def is_current(self):
+        """False once the user's tokens were invalidated in this process"""
+        return self.local_version == _local_user_version(self.user_id)
+
+    @classmethod
+    def from_user(cls, token, user, version=None, local_version=None):
+        values = [getattr(user, attname) for attname in USER_SNAPSHOT_FIELDS]
+        return cls(token, user._state.db, values, version, local_version)
+
+    def get_user(self):
+        # A new instance per request, as views may modify request.user
+        return User.from_db(self.db, USER_SNAPSHOT_FIELDS, self.user_values)
+
+    def to_shared(self):
+        return {
+            "token_class": api_settings.AUTH_TOKEN_CLASSES.index(type(self.token)),
+            "db": self.db,
+            "user_values": self.user_values,
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_shared(cls, raw_token, data):
+        token_class = api_settings.AUTH_TOKEN_CLASSES[data["token_class"]]
+        # Verified by whichever process cached it; only decode the payload
+        token = token_class(raw_token, verify=False)
+        return cls(token, data["db"], data["user_values"], data["version"])
+
+    def expires_in(self):
+        return self.token["exp"] - time.time()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that remembers verified tokens and their users
+
+    A repeated token skips both signature verification and the user query.
+    Entries live in a per-process LRU for TOKEN_AUTH_LOCAL_CACHE_TTL seconds
+    and, with TOKEN_AUTH_SHARED_CACHE, in the shared cache for
+    TOKEN_AUTH_SHARED_CACHE_TIMEOUT, never past the token's expiry. Saving a
+    user other than for last_login invalidates that user's tokens through
+    invalidate_user_tokens(); other processes' local entries can lag by up
+    to the local TTL.
+
+    The async views from ASYNC_AUTH_VIEWS skip this cache: /me/ verifies the
+    token on every request and checks its user from the row it loads with
+    the employee, so a cache hit would save only the signature check.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        digest = hashlib.sha256(raw_token).hexdigest()
+        entry = token_auth_local_cache.get(digest)
+        if entry is not None and not entry.is_current():
+            token_auth_local_cache.delete(digest)
+            entry = None
+        if entry is None and settings.TOKEN_AUTH_SHARED_CACHE:
+            entry = self.get_shared_entry(digest, raw_token)
+        if entry is None:
+            entry = self.verify(digest, raw_token)
+
+        return entry.get_user(), entry.token
+
+    def get_shared_entry(self, digest, raw_token):
+        data = cache.get(_token_key(digest))
+        if data is None:
+            return None
+
+        entry = TokenAuthEntry.from_shared(raw_token, data)
+        if cache.get(_user_version_key(entry.user_id)) != entry.version:
+            # The user changed after this entry was cached
+            return None
+
+        self.store_local(digest, entry)
+        return entry
+
+    def verify(self, digest, raw_token):
+        validated_token = self.get_validated_token(raw_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        # Versions are read before the user so a concurrent invalidation is
+        # not missed
+        local_version = _local_user_version(user_id)
+        version = None
+        if settings.TOKEN_AUTH_SHARED_CACHE:
+            version = cache.get(_user_version_key(user_id))
+
+        user = self.get_user(validated_token)
+        entry = TokenAuthEntry.from_user(validated_token, user, version, local_version)
+        self.store_local(digest, entry)
+        if settings.TOKEN_AUTH_SHARED_CACHE:
+            timeout = min(settings.TOKEN_AUTH_SHARED_CACHE_TIMEOUT, entry.expires_in())
+            if timeout > 0:
+                cache.set(_token_key(digest), entry.to_shared(), timeout)
+        return entry
+
+    def store_local(self, digest, entry):
+        ttl = min(token_auth_local_cache.ttl, entry.expires_in())
+        if ttl > 0:
+            token_auth_local_cache.set(digest, entry, ttl=ttl)
+
+
+def _local_user_version(user_id):
+    return _local_user_versions.get(user_id, 0)
+
+
+def invalidate_user_tokens(user_id):
+    """Make cached tokens of a user be verified and loaded again"""
+    # Entries are keyed by token; bumping the user's version retires only theirs
+    with _local_user_versions_lock:
+        _local_user_versions[user_id] = _local_user_version(user_id) + 1
+    if settings.TOKEN_AUTH_SHARED_CACHE:
+        cache.set(
+            _user_version_key(user_id),
+            uuid.uuid4().hex,
+            settings.TOKEN_AUTH_SHARED_CACHE_TIMEOUT,
+        )
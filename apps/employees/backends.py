@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import check_password
+
+
+class EmployeeModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the employee profile in the same query as the
+    user and checks the password in the hashing pool
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = (
+            UserModel._default_manager.select_related("employee")
+            .filter(**{UserModel.USERNAME_FIELD: username})
+            .first()
+        )
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,77 @@
+"""Helpers shared by the bench_* management commands"""
+
+import statistics
+from contextlib import contextmanager
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from .last_login import last_login_recorder
+from .models import Employee
+
+
+@contextmanager
+def isolated_database():
+    """Run against a throwaway test database so benchmarks never touch real data"""
+    # Logins buffered against the real database are written there first
+    last_login_recorder.flush()
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        # Buffered logins would otherwise be written after the tables are gone
+        last_login_recorder.flush()
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def create_employees(count, password=None, prefix="bench.user", role="employee"):
+    """Bulk create ``count`` synthetic employees sharing one password hash"""
+    encoded = make_password(password)
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"{prefix}{index}",
+                email=f"{prefix}{index}@example.com",
+                password=encoded,
+            )
+            for index in range(count)
+        ]
+    )
+    return Employee.objects.bulk_create(
+        [
+            Employee(
+                user=user,
+                name=f"Bench User {index}",
+                phone="0000000000",
+                address="-",
+                emergency_contact="0000000000",
+                salary="1000.00",
+                position="Engineer",
+                role=role,
+                join_date=date(2024, 1, 1),
+            )
+            for index, user in enumerate(users)
+        ]
+    )
+
+
+def summarize(timings, elapsed):
+    """Throughput and latency percentiles, in ms, of one timed run"""
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "requests": len(timings),
+        "throughput_rps": round(len(timings) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+    }
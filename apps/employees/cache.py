@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .database import ADMIN_STATUS_SCOPE, ause_replica, pin_to_primary, use_replica
+from .models import Employee
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-process cache with per-entry expiry"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return default
+
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Other processes only see invalidations through the shared cache, so local
+# entries are kept for a few seconds at most
+admin_status_local_cache = LRUCache(
+    maxsize=settings.VERIFY_ADMIN_LOCAL_CACHE_SIZE,
+    ttl=settings.VERIFY_ADMIN_LOCAL_CACHE_TTL,
+)
+
+
+def _admin_status_key(field, value):
+    return f"employees:verify_admin:{field}:{value}"
+
+
+def build_admin_status(employee):
+    """verify_admin response body for an employee with its user loaded"""
+    return {
+        "is_admin": employee.is_admin,
+        "user_id": employee.user.id,
+        "username": employee.user.username,
+        "role": employee.role,
+        "name": employee.name,
+    }
+
+
+def _pin_scope(key):
+    """Replica pin scope for the verify_admin results under a cache key"""
+    return f"{ADMIN_STATUS_SCOPE}:{key}"
+
+
+def _admin_status_lookup(user_id, username):
+    """Cache key and Employee filter for a verify_admin lookup"""
+    if user_id:
+        return _admin_status_key("user_id", user_id), {"user_id": user_id}
+    return _admin_status_key("username", username), {"user__username": username}
+
+
+def get_admin_status(user_id=None, username=None):
+    """
+    Cached verify_admin result looked up by user_id or username
+
+    Returns None when no employee matches. Results are stored under both
+    keys so a later lookup by either one is a cache hit.
+    """
+    key, lookup = _admin_status_lookup(user_id, username)
+
+    result = admin_status_local_cache.get(key)
+    if result is not None:
+        return result
+
+    result = cache.get(key)
+    if result is None:
+        use_replica(scopes=[_pin_scope(key)])
+        employee = Employee.objects.select_related("user").filter(**lookup).first()
+        if employee is None:
+            return None
+
+        result = build_admin_status(employee)
+        _store_admin_statuses([result], shared=True)
+    else:
+        _store_admin_statuses([result], shared=False)
+
+    return result
+
+
+async def aget_admin_status(user_id=None, username=None):
+    """get_admin_status() for async views, using the async cache and ORM APIs"""
+    key, lookup = _admin_status_lookup(user_id, username)
+
+    result = admin_status_local_cache.get(key)
+    if result is not None:
+        return result
+
+    result = await cache.aget(key)
+    if result is None:
+        await ause_replica(scopes=[_pin_scope(key)])
+        employee = (
+            await Employee.objects.select_related("user").filter(**lookup).afirst()
+        )
+        if employee is None:
+            return None
+
+        result = build_admin_status(employee)
+        entries = _admin_status_entries([result])
+        await cache.aset_many(entries, settings.VERIFY_ADMIN_CACHE_TIMEOUT)
+    else:
+        entries = _admin_status_entries([result])
+
+    for entry_key, entry in entries.items():
+        admin_status_local_cache.set(entry_key, entry)
+    return result
+
+
+def get_admin_statuses(user_ids=(), usernames=()):
+    """
+    Cached verify_admin results for many users at once
+
+    Returns two dicts mapping each requested user_id and username to its
+    result, or None when no employee matches. Cache misses are resolved with
+    a single query.
+    """
+    keys = {_admin_status_key("user_id", user_id): user_id for user_id in user_ids}
+    keys.update(
+        {_admin_status_key("username", username): username for username in usernames}
+    )
+
+    found = {}
+    for key in keys:
+        result = admin_status_local_cache.get(key)
+        if result is not None:
+            found[key] = result
+
+    shared_hits = cache.get_many([key for key in keys if key not in found])
+    _store_admin_statuses(shared_hits.values(), shared=False)
+    found.update(shared_hits)
+
+    missing_ids = [
+        user_id
+        for user_id in user_ids
+        if _admin_status_key("user_id", user_id) not in found
+    ]
+    missing_usernames = [
+        username
+        for username in usernames
+        if _admin_status_key("username", username) not in found
+    ]
+    if missing_ids or missing_usernames:
+        use_replica(scopes=[_pin_scope(key) for key in keys if key not in found])
+        employees = Employee.objects.select_related("user").filter(
+            Q(user_id__in=missing_ids) | Q(user__username__in=missing_usernames)
+        )
+        results = [build_admin_status(employee) for employee in employees]
+        _store_admin_statuses(results, shared=True)
+        for result in results:
+            found[_admin_status_key("user_id", result["user_id"])] = result
+            found[_admin_status_key("username", result["username"])] = result
+
+    return (
+        {
+            user_id: found.get(_admin_status_key("user_id", user_id))
+            for user_id in user_ids
+        },
+        {
+            username: found.get(_admin_status_key("username", username))
+            for username in usernames
+        },
+    )
+
+
+def _admin_status_entries(results):
+    entries = {}
+    for result in results:
+        entries[_admin_status_key("user_id", result["user_id"])] = result
+        entries[_admin_status_key("username", result["username"])] = result
+    return entries
+
+
+def _store_admin_statuses(results, shared):
+    entries = _admin_status_entries(results)
+    if shared and entries:
+        cache.set_many(entries, settings.VERIFY_ADMIN_CACHE_TIMEOUT)
+    for key, result in entries.items():
+        admin_status_local_cache.set(key, result)
+
+
+def invalidate_admin_status(user_id, username=None):
+    """
+    Drop cached verify_admin results for a user from both cache tiers
+
+    Lookups of the user by id or by any username known here then read from
+    the primary until replicas have caught up.
+    """
+    id_key = _admin_status_key("user_id", user_id)
+    keys = {id_key}
+    if username:
+        keys.add(_admin_status_key("username", username))
+
+    # The cached entry knows the previous username, which may have changed
+    cached = admin_status_local_cache.get(id_key) or cache.get(id_key)
+    if cached:
+        keys.add(_admin_status_key("username", cached["username"]))
+
+    cache.delete_many(keys)
+    for key in keys:
+        admin_status_local_cache.delete(key)
+    pin_to_primary(*(_pin_scope(key) for key in keys))
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Employee, EmployeeTombstone
+from .serializers import EMPLOYEE_LIST_FIELDS, employee_list_representation
+
+
+class InvalidWatermark(ValueError):
+    pass
+
+
+def encode_watermark(updated, deleted):
+    """Opaque token for the (timestamp, id) positions of both change streams"""
+    payload = {
+        "updated": [updated[0].isoformat(), updated[1]] if updated else None,
+        "deleted": [deleted[0].isoformat(), deleted[1]] if deleted else None,
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_watermark(watermark):
+    if not watermark:
+        return None, None
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(watermark.encode()))
+        positions = []
+        for key in ("updated", "deleted"):
+            if payload[key] is None:
+                positions.append(None)
+                continue
+            timestamp = parse_datetime(payload[key][0])
+            if timestamp is None:
+                raise ValueError(payload[key][0])
+            positions.append((timestamp, int(payload[key][1])))
+    except (ValueError, TypeError, KeyError, IndexError) as exc:
+        raise InvalidWatermark("Invalid watermark") from exc
+
+    return tuple(positions)
+
+
+def _after(queryset, field, position):
+    """Keyset filter for rows strictly after (timestamp, id)"""
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(
+        Q(**{f"{field}__gt": timestamp}) | Q(**{field: timestamp, "id__gt": pk})
+    )
+
+
+def get_changes(watermark=None, limit=500, safety_lag=0):
+    """
+    Employees changed and deleted since a watermark, oldest first
+
+    Both streams are read with an index range scan on (timestamp, id) and
+    return at most ``limit`` rows each. ``has_more`` tells the client to
+    call again with ``next_watermark`` right away.
+
+    Timestamps are taken when a row is saved, not when its transaction
+    commits, so a slow transaction can commit a row older than one already
+    returned. Rows newer than ``safety_lag`` seconds are held back until
+    such transactions have committed.
+    """
+    updated, deleted = decode_watermark(watermark)
+    cutoff = timezone.now() - timedelta(seconds=safety_lag)
+
+    employees = list(
+        _after(
+            Employee.objects.filter(updated_at__lte=cutoff).values(
+                *EMPLOYEE_LIST_FIELDS, "updated_at"
+            ),
+            "updated_at",
+            updated,
+        ).order_by("updated_at", "id")[: limit + 1]
+    )
+    tombstones = list(
+        _after(
+            EmployeeTombstone.objects.filter(deleted_at__lte=cutoff),
+            "deleted_at",
+            deleted,
+        ).order_by("deleted_at", "id")[: limit + 1]
+    )
+    has_more = len(employees) > limit or len(tombstones) > limit
+    employees = employees[:limit]
+    tombstones = tombstones[:limit]
+
+    if employees:
+        updated = (employees[-1]["updated_at"], employees[-1]["id"])
+    if tombstones:
+        deleted = (tombstones[-1].deleted_at, tombstones[-1].pk)
+
+    return {
+        "changed": [employee_list_representation(row) for row in employees],
+        "deleted": [
+            {
+                "id": tombstone.employee_id,
+                "user_id": tombstone.user_id,
+                "username": tombstone.username,
+                "deleted_at": tombstone.deleted_at.isoformat(),
+            }
+            for tombstone in tombstones
+        ],
+        "next_watermark": encode_watermark(updated, deleted),
+        "has_more": has_more,
+    }
+
+
+def prune_tombstones():
+    """
+    Delete tombstones older than EMPLOYEE_TOMBSTONE_RETENTION_DAYS; returns the count
+
+    A client whose last sync is older than that misses those deletions and
+    must start over from /api/employees/export/.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.EMPLOYEE_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = EmployeeTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,36 @@
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# Columns needed to check permissions and compute validators
+VALIDATOR_FIELDS = ["id", "user_id", "updated_at"]
+
+
+def is_conditional_request(request):
+    return "HTTP_IF_NONE_MATCH" in request.META or (
+        "HTTP_IF_MODIFIED_SINCE" in request.META
+    )
+
+
+def employee_etag(employee):
+    """Strong ETag that changes whenever updated_at does"""
+    return f'"{employee.pk}-{int(employee.updated_at.timestamp() * 1_000_000)}"'
+
+
+def get_not_modified_response(request, employee):
+    """304 response when the client's copy of the employee is current, else None"""
+    response = get_conditional_response(
+        request,
+        etag=employee_etag(employee),
+        last_modified=int(employee.updated_at.timestamp()),
+    )
+    if response is not None:
+        set_validator_headers(response, employee)
+    return response
+
+
+def set_validator_headers(response, employee):
+    response["ETag"] = employee_etag(employee)
+    response["Last-Modified"] = http_date(employee.updated_at.timestamp())
+    # Let clients keep their copy but revalidate it on every use
+    response["Cache-Control"] = "private, no-cache"
+    return response
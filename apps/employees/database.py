@@ -0,0 +1,234 @@
+"""
+Per-connection database setup and read-replica routing
+
+SQLite has no server-side configuration, so settings.SQLITE_PRAGMAS are
+applied to every new connection. journal_mode=wal is stored in the database
+file and only needs the write lock the first time it is set.
+
+Reads go to the DB_REPLICA_* databases only inside a request that opted in
+with use_replica(); everything else, and every write, uses the primary.
+A user who has just written is pinned to the primary for
+DB_REPLICA_PIN_SECONDS so they read their own writes, and a change to an
+employee pins verify_admin lookups of that user so a lagging replica cannot
+put a stale result back in the cache.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Prefix of the pin scopes for verify_admin reads of one user, after a change
+ADMIN_STATUS_SCOPE = "admin_status"
+
+# None outside request_routing(), where use_replica() does nothing
+_replica_reads = ContextVar("replica_reads", default=None)
+
+# Seconds a replica is behind; zero when it has replayed everything it has
+# received, as pg_last_xact_replay_timestamp() stays old on an idle primary
+REPLICATION_LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+        "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM "
+        "now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            if value:
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def live_database_name():
+    """NAME of the default database, which tests and benchmarks swap out"""
+    return connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+
+
+def _pin_key(scope):
+    return f"employees:db_pin:{scope}"
+
+
+def _user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def pin_to_primary(*scopes):
+    """Read from the primary for the scopes for the next DB_REPLICA_PIN_SECONDS"""
+    if settings.DB_REPLICAS and scopes:
+        cache.set_many(
+            {_pin_key(scope): True for scope in scopes},
+            settings.DB_REPLICA_PIN_SECONDS,
+        )
+
+
+def pin_user_to_primary(user_id):
+    pin_to_primary(_user_scope(user_id))
+
+
+@contextmanager
+def request_routing():
+    """Scope a request; reads use the primary unless use_replica() is called"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _pin_keys(user_id, scopes):
+    if user_id is not None:
+        scopes = [*scopes, _user_scope(user_id)]
+    return [_pin_key(scope) for scope in scopes]
+
+
+def use_replica(user_id=None, scopes=()):
+    """
+    Send the rest of this request's reads to a replica
+
+    Unless the user or one of the scopes is pinned to the primary, or this
+    is not inside request_routing(). Returns whether replica reads were
+    turned on.
+    """
+    if not settings.DB_REPLICAS or _replica_reads.get() is None:
+        return False
+    if cache.get_many(_pin_keys(user_id, scopes)):
+        return False
+
+    _replica_reads.set(True)
+    return True
+
+
+async def ause_replica(user_id=None, scopes=()):
+    """use_replica() for async views"""
+    if not settings.DB_REPLICAS or _replica_reads.get() is None:
+        return False
+    if await cache.aget_many(_pin_keys(user_id, scopes)):
+        return False
+
+    _replica_reads.set(True)
+    return True
+
+
+class ReplicaSelector:
+    """
+    Round-robin over the replicas, or the least lagging one
+
+    With "least_lag", each replica's lag is measured at most every
+    DB_REPLICA_LAG_CHECK_INTERVAL seconds; replicas further behind than
+    DB_REPLICA_MAX_LAG, or unreachable, are skipped until the next check.
+    One request measures while the others keep using the previous lags, or
+    the primary before the first measurement.
+    """
+
+    def __init__(self, aliases, strategy, max_lag, check_interval):
+        self.aliases = list(aliases)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.aliases)
+        self._lags = {}
+        self._checked_at = float("-inf")
+        self._checking = False
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """A replica alias, or None to read from the primary"""
+        if not self.aliases:
+            return None
+        if self.strategy != "least_lag":
+            return next(self._cycle)
+
+        lags = self.lags()
+        candidates = [
+            alias
+            for alias in self.aliases
+            if lags.get(alias, float("inf")) <= self.max_lag
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lags.__getitem__)
+
+    def lags(self):
+        with self._lock:
+            due = (
+                not self._checking
+                and time.monotonic() - self._checked_at >= self.check_interval
+            )
+            if not due:
+                return self._lags
+            self._checking = True
+
+        # Outside the lock, so a slow replica only holds up this request
+        lags = {}
+        try:
+            lags = {alias: self.measure_lag(alias) for alias in self.aliases}
+        finally:
+            with self._lock:
+                if lags:
+                    self._lags = lags
+                self._checked_at = time.monotonic()
+                self._checking = False
+        return lags
+
+    def measure_lag(self, alias):
+        connection = connections[alias]
+        query = REPLICATION_LAG_QUERIES.get(connection.vendor)
+        if query is None:
+            return 0.0
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            return float("inf")
+
+
+class PrimaryReplicaRouter:
+    """Database router for the primary and the DB_REPLICA_* databases"""
+
+    def __init__(self):
+        self.selector = ReplicaSelector(
+            settings.DB_REPLICAS,
+            strategy=settings.DB_REPLICA_SELECTION,
+            max_lag=settings.DB_REPLICA_MAX_LAG,
+            check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL,
+        )
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads in a transaction must see its writes
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in self.selector.aliases:
+            # Related objects come from the replica their parent was read from
+            return instance._state.db
+        return self.selector.choose() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Also for instances read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
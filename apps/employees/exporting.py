@@ -0,0 +1,64 @@
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Employee
+from .serializers import (
+    EMPLOYEE_LIST_FIELDS,
+    EmployeeListSerializer,
+    employee_list_representation,
+)
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset():
+    """Every employee's list columns, joined with its user"""
+    return Employee.objects.values(*EMPLOYEE_LIST_FIELDS).order_by("id")
+
+
+def iter_employee_rows(queryset=None):
+    """
+    Yield EmployeeListSerializer representations with a server-side cursor
+
+    Rows are plain values() dicts rendered by employee_list_representation,
+    so no model or serializer instance is built per employee.
+    """
+    if queryset is None:
+        queryset = export_queryset()
+
+    for row in queryset.iterator(chunk_size=settings.EMPLOYEE_EXPORT_CHUNK_SIZE):
+        yield employee_list_representation(row)
+
+
+def iter_ndjson(rows):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EmployeeListSerializer.Meta.fields)
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def stream_employees(fmt):
+    """Text chunks of the whole directory as NDJSON or CSV"""
+    rows = iter_employee_rows()
+    if fmt == "csv":
+        return iter_csv(rows)
+    return iter_ndjson(rows)
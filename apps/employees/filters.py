@@ -0,0 +1,67 @@
+from django.db import connection
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Employee, normalize_search_text
+
+# Sorts after every character, so [prefix, prefix + _PREFIX_END) is a range
+_PREFIX_END = "\U0010ffff"
+
+
+class EmployeeFilterSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, max_length=200)
+    phone = serializers.CharField(required=False, max_length=20)
+    position = serializers.CharField(required=False, max_length=100)
+    role = serializers.ChoiceField(choices=Employee.ROLE_CHOICES, required=False)
+    joined_after = serializers.DateField(required=False)
+    joined_before = serializers.DateField(required=False)
+
+
+def filter_name_prefix(queryset, prefix):
+    """Typeahead match on the start of the normalized name"""
+    prefix = normalize_search_text(prefix)
+    if not prefix:
+        return queryset
+
+    if connection.vendor == "postgresql":
+        # LIKE 'prefix%' is served by the pg_trgm GIN index
+        return queryset.filter(search_name__startswith=prefix)
+
+    # A range works with the plain B-tree index, unlike SQLite's LIKE
+    return queryset.filter(
+        search_name__gte=prefix, search_name__lt=prefix + _PREFIX_END
+    )
+
+
+class EmployeeSearchFilter(BaseFilterBackend):
+    """
+    Indexed list filters
+
+    ?name= matches a name prefix, ignoring case and accents. ?phone=,
+    ?position= and ?role= are exact matches, and ?joined_after= and
+    ?joined_before= bound join_date (inclusive).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action != "list":
+            return queryset
+
+        serializer = EmployeeFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        if "name" in params:
+            queryset = filter_name_prefix(queryset, params["name"]).order_by(
+                "search_name", "id"
+            )
+        if "phone" in params:
+            queryset = queryset.filter(phone=params["phone"])
+        if "position" in params:
+            queryset = queryset.filter(position=params["position"])
+        if "role" in params:
+            queryset = queryset.filter(role=params["role"])
+        if "joined_after" in params:
+            queryset = queryset.filter(join_date__gte=params["joined_after"])
+        if "joined_before" in params:
+            queryset = queryset.filter(join_date__lte=params["joined_before"])
+        return queryset
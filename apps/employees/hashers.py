@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with costs from ARGON2_TIME_COST, ARGON2_MEMORY_COST (KiB) and
+    ARGON2_PARALLELISM
+
+    Hashes made with other costs still verify and are re-hashed on the next
+    successful login.
+    """
+
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """Scrypt with N, r and p from SCRYPT_WORK_FACTOR, SCRYPT_BLOCK_SIZE and SCRYPT_PARALLELISM"""
+
+    work_factor = settings.SCRYPT_WORK_FACTOR
+    block_size = settings.SCRYPT_BLOCK_SIZE
+    parallelism = settings.SCRYPT_PARALLELISM
+    # scrypt needs 128 * N * r bytes; leave room for hashes made with a
+    # larger N before a downgrade
+    maxmem = 2 * 128 * work_factor * block_size + 1024 * 1024
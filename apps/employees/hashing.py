@@ -0,0 +1,147 @@
+"""
+Password hashing off the request thread
+
+Hashes run in a process pool of PASSWORD_HASH_PROCESSES workers, so slow
+hashes use every core without holding the GIL or a request thread's CPU
+slot. At most PASSWORD_HASH_MAX_PENDING hashes are queued or running per
+web process; past that, HashingOverloaded turns the request into a 503 at
+once, so a login burst cannot make every other request time out.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .metrics import record_time
+
+
+class HashingOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many logins in progress, try again shortly.")
+    default_code = "hashing_overloaded"
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+def setup_worker():
+    # Spawned workers start without Django; forked ones return immediately
+    django.setup()
+
+
+def verify_password(raw_password, encoded):
+    """
+    Check a password against its hash, in a pool worker
+
+    Returns (is_correct, new_encoded). new_encoded is a fresh hash from the
+    preferred hasher when the password is correct but the stored hash is
+    outdated, else None.
+    """
+    upgraded = None
+
+    def setter(raw_password):
+        nonlocal upgraded
+        upgraded = hashers.make_password(raw_password)
+
+    return hashers.check_password(raw_password, encoded, setter), upgraded
+
+
+def make_passwords(raw_passwords):
+    """make_password() for each of raw_passwords, in a pool worker"""
+    return [hashers.make_password(raw_password) for raw_password in raw_passwords]
+
+
+class PasswordHashPool:
+    """ProcessPoolExecutor with a cap on queued and running hashes"""
+
+    def __init__(self, processes, max_pending):
+        self.processes = max(1, processes)
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, initializer=setup_worker
+                )
+            return self._executor
+
+    def submit(self, func, *args):
+        """Future for func(*args) in a worker; raises HashingOverloaded when full"""
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    processes=settings.PASSWORD_HASH_PROCESSES,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+def hash_password(raw_password):
+    """make_password() in the hashing pool; None gives an unusable password"""
+    if raw_password is None:
+        return hashers.make_password(None)
+    future = password_hash_pool.submit(hashers.make_password, raw_password)
+    with record_time("password_hash"):
+        return future.result()
+
+
+def check_password(user, raw_password):
+    """
+    user.check_password() in the hashing pool
+
+    A None user still costs one hash, like ModelBackend, so response times
+    do not reveal whether a username exists. Outdated hashes are replaced
+    with one from the preferred hasher.
+    """
+    if user is None:
+        hash_password(raw_password)
+        return False
+
+    future = password_hash_pool.submit(verify_password, raw_password, user.password)
+    with record_time("password_hash"):
+        is_correct, upgraded = future.result()
+    if upgraded:
+        user.password = upgraded
+        user.save(update_fields=["password"])
+    return is_correct
+
+
+async def acheck_password(user, raw_password):
+    """check_password() for async views"""
+    if user is None:
+        future = password_hash_pool.submit(hashers.make_password, raw_password)
+        with record_time("password_hash"):
+            await asyncio.wrap_future(future)
+        return False
+
+    future = password_hash_pool.submit(verify_password, raw_password, user.password)
+    with record_time("password_hash"):
+        is_correct, upgraded = await asyncio.wrap_future(future)
+    if upgraded:
+        user.password = upgraded
+        await user.asave(update_fields=["password"])
+    return is_correct
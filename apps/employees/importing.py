@@ -0,0 +1,291 @@
+import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .hashing import HashingOverloaded, make_passwords, setup_worker
+from .models import Employee, normalize_search_text
+from .serializers import EmployeeImportSerializer
+
+# Passwords per task in the shared hashing pool, so a login queued behind
+# an import waits for at most this many hashes
+POOL_HASH_BATCH_SIZE = 8
+
+
+class InvalidRow:
+    """A row that could not be read, reported by the importer with its number"""
+
+    def __init__(self, message):
+        self.errors = {"non_field_errors": [message]}
+
+
+def read_rows(stream, fmt):
+    """
+    Yield row dicts from a CSV or JSON Lines text stream
+
+    Rows that cannot be read yield an InvalidRow instead, so one bad line
+    does not stop the import. Open the stream with errors="surrogateescape"
+    to have text that is not UTF-8 reported per row as well.
+    """
+    if fmt == "csv":
+        rows = _csv_rows(stream)
+    elif fmt == "jsonl":
+        rows = _json_lines(stream)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    for row in rows:
+        if not isinstance(row, InvalidRow) and not _is_utf8(row):
+            row = InvalidRow("Row is not valid UTF-8.")
+        yield row
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(stream)
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield InvalidRow(f"Invalid CSV: {exc}")
+
+
+def _json_lines(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield InvalidRow(f"Invalid JSON: {exc}")
+            continue
+        if isinstance(row, dict):
+            yield row
+        else:
+            yield InvalidRow("Expected a JSON object.")
+
+
+def _is_utf8(row):
+    # Undecodable bytes come through surrogateescape as lone surrogates
+    try:
+        json.dumps(row, ensure_ascii=False).encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def read_uploaded_rows(uploaded_file):
+    """Rows of an uploaded .csv or .jsonl file"""
+    fmt = "csv" if uploaded_file.name.lower().endswith(".csv") else "jsonl"
+    stream = io.TextIOWrapper(
+        uploaded_file.file, encoding="utf-8-sig", errors="surrogateescape"
+    )
+    return read_rows(stream, fmt)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class EmployeeImporter:
+    """
+    Create users and employees in bulk
+
+    Rows are validated and inserted in chunks, each in its own transaction
+    with one bulk_create for users and one for employees. Passwords are
+    hashed in a process pool of ``workers`` processes, or in the shared
+    PasswordHashPool when ``hash_pool`` is given, as in web requests; rows
+    without a password, or all rows when unusable_passwords is set, get an
+    unusable password for invite flows. Invalid rows are reported and
+    skipped without aborting the import.
+    """
+
+    def __init__(
+        self, chunk_size=500, workers=None, unusable_passwords=False, hash_pool=None
+    ):
+        self.chunk_size = chunk_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.unusable_passwords = unusable_passwords
+        self.hash_pool = hash_pool
+        self.created = 0
+        self.errors = []
+        self._seen_usernames = set()
+        self._pool = None
+
+    def run(self, rows):
+        try:
+            for chunk in _chunks(enumerate(rows, start=1), self.chunk_size):
+                self._import_chunk(chunk)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        return self.report()
+
+    def report(self):
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+    def _import_chunk(self, chunk):
+        valid = []
+        for row_number, row in chunk:
+            if isinstance(row, InvalidRow):
+                self._add_error(row_number, row.errors)
+                continue
+
+            serializer = EmployeeImportSerializer(data=row)
+            if not serializer.is_valid():
+                self._add_error(row_number, serializer.errors)
+                continue
+
+            username = serializer.validated_data["username"]
+            if username in self._seen_usernames:
+                self._add_error(
+                    row_number, {"username": ["Duplicate username in this import."]}
+                )
+                continue
+
+            self._seen_usernames.add(username)
+            valid.append((row_number, serializer.validated_data))
+
+        existing = set(
+            User.objects.filter(
+                username__in=[data["username"] for _, data in valid]
+            ).values_list("username", flat=True)
+        )
+        rows = []
+        for row_number, data in valid:
+            if data["username"] in existing:
+                self._add_error(
+                    row_number,
+                    {"username": ["A user with that username already exists."]},
+                )
+            else:
+                rows.append((row_number, data))
+
+        if not rows:
+            return
+
+        passwords = self._hash_passwords([data.get("password") for _, data in rows])
+        try:
+            with transaction.atomic():
+                self._bulk_insert([data for _, data in rows], passwords)
+            self.created += len(rows)
+        except IntegrityError:
+            # Something changed under us, retry row by row to find the culprits
+            for (row_number, data), password in zip(rows, passwords):
+                try:
+                    with transaction.atomic():
+                        self._bulk_insert([data], [password])
+                    self.created += 1
+                except IntegrityError as exc:
+                    self._add_error(row_number, {"non_field_errors": [str(exc)]})
+
+    def _bulk_insert(self, rows, passwords):
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=data["username"],
+                    email=User.objects.normalize_email(data.get("email", "")),
+                    password=password,
+                )
+                for data, password in zip(rows, passwords)
+            ]
+        )
+        if any(user.pk is None for user in users):
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(
+                User.objects.filter(
+                    username__in=[user.username for user in users]
+                ).values_list("username", "id")
+            )
+            for user in users:
+                user.pk = ids[user.username]
+
+        Employee.objects.bulk_create(
+            [
+                Employee(user=user, **self._employee_fields(data))
+                for user, data in zip(users, rows)
+            ]
+        )
+
+    def _employee_fields(self, data):
+        fields = {
+            field: value
+            for field, value in data.items()
+            if field not in ("username", "email", "password")
+        }
+        # bulk_create skips Employee.save(), which normally sets this
+        fields["search_name"] = normalize_search_text(fields["name"])
+        return fields
+
+    def _hash_passwords(self, passwords):
+        if self.unusable_passwords:
+            passwords = [None] * len(passwords)
+
+        to_hash = [index for index, password in enumerate(passwords) if password]
+        hashed = [make_password(None) for _ in passwords]
+        if not to_hash:
+            return hashed
+
+        raw = [passwords[index] for index in to_hash]
+        if self.hash_pool is not None:
+            results = self._hash_in_shared_pool(raw)
+        elif self.workers > 1 and len(raw) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=setup_worker
+                )
+            chunksize = max(1, len(raw) // (self.workers * 4))
+            results = self._pool.map(make_password, raw, chunksize=chunksize)
+        else:
+            results = map(make_password, raw)
+
+        for index, encoded in zip(to_hash, results):
+            hashed[index] = encoded
+        return hashed
+
+    def _hash_in_shared_pool(self, raw):
+        """
+        Hash in small batches, at most one per pool process at a time
+
+        Logins share the pool, so they queue behind a few short batches
+        rather than the whole chunk. A batch the pool has no room for is
+        hashed here instead of failing the import.
+        """
+        batches = [
+            raw[start : start + POOL_HASH_BATCH_SIZE]
+            for start in range(0, len(raw), POOL_HASH_BATCH_SIZE)
+        ]
+        in_flight = deque()
+        hashed = []
+        for batch in batches:
+            if len(in_flight) >= self.hash_pool.processes:
+                hashed += in_flight.popleft().result()
+            try:
+                future = self.hash_pool.submit(make_passwords, batch)
+            except HashingOverloaded:
+                future = Future()
+                future.set_result(make_passwords(batch))
+            in_flight.append(future)
+
+        for future in in_flight:
+            hashed += future.result()
+        return hashed
+
+    def _add_error(self, row_number, errors):
+        self.errors.append({"row": row_number, "errors": errors})
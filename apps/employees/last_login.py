@@ -0,0 +1,130 @@
+"""
+Buffered last_login updates for the login endpoints
+
+Logins record the time in memory and a background thread writes all
+pending users with one bulk_update every LAST_LOGIN_FLUSH_INTERVAL seconds,
+so a login never waits for the write lock on SQLite or churns auth_user
+rows on Postgres. last_login in the database lags by at most the interval;
+the buffer is also flushed at exit, and lost only if the process is killed.
+
+Pending times are kept per database NAME and only written to the database
+they were recorded on, so logins made against a test database are never
+written to the real one once the test settings are undone. Tests call
+last_login_recorder.clear() to start and end with an empty buffer.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .database import live_database_name
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    User id -> latest login time, written in batches by a daemon thread
+
+    The thread starts on the first record(), so forked workers each get
+    their own. Reaching flush_size pending users wakes it early. A
+    flush_interval of 0 writes each login at once, as Django does.
+
+    Pending logins are grouped by the database they were recorded on.
+    """
+
+    def __init__(self, flush_interval, flush_size):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def record(self, user):
+        user.last_login = timezone.now()
+        if self.flush_interval <= 0:
+            user.save(update_fields=["last_login"])
+            return
+
+        with self._lock:
+            pending = self._pending.setdefault(live_database_name(), {})
+            pending[user.pk] = user.last_login
+            if len(pending) >= self.flush_size:
+                self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="last-login-flush", daemon=True
+                )
+                self._thread.start()
+
+    async def arecord(self, user):
+        """record() for async views"""
+        if self.flush_interval > 0:
+            self.record(user)
+            return
+
+        user.last_login = timezone.now()
+        await user.asave(update_fields=["last_login"])
+
+    def flush(self):
+        """
+        Write the login times recorded on the live database; returns how many
+
+        Times recorded while the default database was another one, such as
+        a test database that has since been dropped, are discarded.
+        """
+        database = live_database_name()
+        with self._lock:
+            pending = self._pending.pop(database, {})
+            stale = sum(len(users) for users in self._pending.values())
+            self._pending = {}
+
+        if stale:
+            logger.warning(
+                "Discarded %d last_login times recorded on another database", stale
+            )
+        if not pending:
+            return 0
+
+        try:
+            User.objects.bulk_update(
+                [User(pk=pk, last_login=when) for pk, when in pending.items()],
+                ["last_login"],
+                batch_size=self.flush_size,
+            )
+        except Exception:
+            # Keep them for the next flush, behind any newer logins
+            with self._lock:
+                newer = self._pending.get(database, {})
+                self._pending[database] = {**pending, **newer}
+            raise
+        return len(pending)
+
+    def clear(self):
+        """Forget the pending login times without writing them"""
+        with self._lock:
+            self._pending = {}
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not write last_login times")
+            finally:
+                close_old_connections()
+
+
+last_login_recorder = LastLoginRecorder(
+    flush_interval=settings.LAST_LOGIN_FLUSH_INTERVAL,
+    flush_size=settings.LAST_LOGIN_FLUSH_SIZE,
+)
+atexit.register(last_login_recorder.flush)
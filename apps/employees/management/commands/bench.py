@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.employees.api_keys import generate_api_key, hash_api_key
+from apps.employees.benchmarks import (
+    create_employees,
+    isolated_database,
+    summarize,
+)
+from apps.employees.models import APIClient as APIClientModel
+from apps.employees.serializers import CustomTokenObtainPairSerializer
+
+SCENARIOS = ["login", "refresh", "me", "list", "retrieve", "verify_admin"]
+PASSWORD = "bench-pass-123"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic employees, drive the auth and directory endpoints and "
+        "write latency percentiles, throughput and queries per request as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=1000)
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Timed requests per scenario"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=10, help="Untimed requests per scenario"
+        )
+        parser.add_argument(
+            "--scenarios",
+            default=",".join(SCENARIOS),
+            help=f"Comma-separated subset of {', '.join(SCENARIOS)}",
+        )
+        parser.add_argument(
+            "--output",
+            help="Results file; defaults to bench-results-<time>.json in the "
+            "system temp directory",
+        )
+        parser.add_argument(
+            "--compare", help="Earlier results file to print the change against"
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name for name in options["scenarios"].split(",") if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        if options["employees"] < 1 or options["requests"] < 2:
+            raise CommandError("Need at least 1 employee and 2 requests")
+
+        # Budget warnings would repeat what the report says, once per request
+        logging.getLogger("apps.employees.metrics").setLevel(logging.ERROR)
+
+        with isolated_database():
+            results = {
+                "meta": self.describe_run(options),
+                "results": self.run_benchmark(
+                    scenarios,
+                    options["employees"],
+                    options["requests"],
+                    options["warmup"],
+                ),
+            }
+
+        path = options["output"] or os.path.join(
+            tempfile.gettempdir(),
+            f"bench-results-{datetime.now():%Y%m%d-%H%M%S}.json",
+        )
+        with open(path, "w") as output:
+            json.dump(results, output, indent=2)
+            output.write("\n")
+
+        self.report(results["results"])
+        if options["compare"]:
+            with open(options["compare"]) as previous:
+                self.compare(json.load(previous)["results"], results["results"])
+        self.stdout.write(f"Results written to {path}")
+
+    def describe_run(self, options):
+        """What a result depends on besides the code, to compare runs fairly"""
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "password_hasher": settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1],
+            "async_auth_views": settings.ASYNC_AUTH_VIEWS,
+            "employees": options["employees"],
+            "requests": options["requests"],
+            "warmup": options["warmup"],
+        }
+
+    def run_benchmark(self, scenarios, employees, requests, warmup):
+        admin = create_employees(
+            1, password=PASSWORD, prefix="bench.admin", role="admin"
+        )[0]
+        create_employees(employees, password=PASSWORD)
+
+        prefix, key = generate_api_key()
+        APIClientModel.objects.create(
+            name="bench", key_prefix=prefix, key_hash=hash_api_key(key)
+        )
+        users = list(
+            User.objects.select_related("employee")
+            .filter(username__startswith="bench.user")
+            .order_by("pk")
+        )
+        admin_access = str(
+            CustomTokenObtainPairSerializer.get_token(admin.user).access_token
+        )
+
+        results = {}
+        for name in scenarios:
+            requests_for = getattr(self, f"{name}_requests")
+            total = warmup + requests
+            calls = requests_for(users, total, admin_access=admin_access, key=key)
+            results[name] = self.measure(name, calls, warmup)
+        return results
+
+    # Each *_requests method returns one callable per request, taking the
+    # client. Anything that is not the request itself, such as minting
+    # tokens, happens here so it stays out of the timings.
+
+    def login_requests(self, users, total, **kwargs):
+        # Throttles stay on: successful logins do not count against the
+        # per-username rate, and a client IP per request keeps each one
+        # under the per-IP rate
+        return [
+            lambda client, index=index: client.post(
+                "/api/auth/login/",
+                {"username": users[index % len(users)].username, "password": PASSWORD},
+                format="json",
+                REMOTE_ADDR=f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+            )
+            for index in range(total)
+        ]
+
+    def refresh_requests(self, users, total, **kwargs):
+        # Refresh tokens are single use, so mint one per request
+        tokens = [
+            str(CustomTokenObtainPairSerializer.get_token(users[index % len(users)]))
+            for index in range(total)
+        ]
+        return [
+            lambda client, token=token: client.post(
+                "/api/auth/refresh/", {"refresh": token}, format="json"
+            )
+            for token in tokens
+        ]
+
+    def me_requests(self, users, total, **kwargs):
+        tokens = [
+            str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+            for user in users[:total]
+        ]
+        return [
+            lambda client, token=tokens[index % len(tokens)]: client.get(
+                "/api/employees/me/", HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+            for index in range(total)
+        ]
+
+    def list_requests(self, users, total, admin_access, **kwargs):
+        return [
+            lambda client: client.get(
+                "/api/employees/", HTTP_AUTHORIZATION=f"Bearer {admin_access}"
+            )
+        ] * total
+
+    def retrieve_requests(self, users, total, admin_access, **kwargs):
+        employee_ids = [user.employee.pk for user in users[:total]]
+        return [
+            lambda client, pk=employee_ids[index % len(employee_ids)]: client.get(
+                f"/api/employees/{pk}/", HTTP_AUTHORIZATION=f"Bearer {admin_access}"
+            )
+            for index in range(total)
+        ]
+
+    def verify_admin_requests(self, users, total, key, **kwargs):
+        # Cycling through users mixes cold and warm verify_admin cache entries
+        return [
+            lambda client, username=users[index % len(users)].username: client.post(
+                "/api/employees/verify_admin/",
+                {"username": username},
+                format="json",
+                HTTP_X_API_KEY=key,
+            )
+            for index in range(total)
+        ]
+
+    def measure(self, name, calls, warmup):
+        client = APIClient()
+        for call in calls[:warmup]:
+            call(client)
+
+        timings = []
+        queries = 0
+        errors = 0
+        started = time.perf_counter()
+        for call in calls[warmup:]:
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = call(client)
+                timings.append(time.perf_counter() - request_started)
+            queries += len(captured)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        if errors:
+            self.stderr.write(f"{name}: {errors} of {len(timings)} requests failed")
+
+        return {
+            **summarize(timings, elapsed),
+            "errors": errors,
+            "queries_per_request": round(queries / len(timings), 2),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'scenario':<14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'queries':>9}{'errors':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<14}{result['throughput_rps']:>10.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}{result['queries_per_request']:>9.2f}"
+                f"{result['errors']:>8}"
+            )
+
+    def compare(self, previous, current):
+        self.stdout.write("Change against the earlier run:")
+        for name, result in current.items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            self.stdout.write(
+                f"{name:<14}"
+                f"req/s {self.change(before['throughput_rps'], result['throughput_rps'])}"
+                f"  p95 {self.change(before['p95_ms'], result['p95_ms'])}"
+                f"  queries {before['queries_per_request']:g}"
+                f" -> {result['queries_per_request']:g}"
+            )
+
+    def change(self, before, after):
+        if not before:
+            return "n/a"
+        return f"{(after - before) / before * 100:+.1f}%"
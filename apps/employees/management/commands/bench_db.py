@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from apps.employees.benchmarks import create_employees, isolated_database, summarize
+from apps.employees.serializers import CustomTokenObtainPairSerializer
+
+# What DATABASES and SQLITE_PRAGMAS gave before connection tuning
+BASELINE = {
+    "CONN_MAX_AGE": 0,
+    "CONN_HEALTH_CHECKS": False,
+    "SQLITE_PRAGMAS": {"journal_mode": "delete", "synchronous": "full"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec with and without persistent connections and the "
+        "SQLite PRAGMAs, from several threads mixing reads and writes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=200)
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per thread"
+        )
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--write-every",
+            type=int,
+            default=5,
+            help="Every Nth request is a PATCH, the rest are GETs",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2 or options["threads"] < 1:
+            raise CommandError("Need at least 1 thread and 2 requests")
+
+        logging.getLogger("apps.employees.metrics").setLevel(logging.ERROR)
+        database = connections["default"].settings_dict
+        tuned = {
+            "CONN_MAX_AGE": database["CONN_MAX_AGE"],
+            "CONN_HEALTH_CHECKS": database["CONN_HEALTH_CHECKS"],
+            "SQLITE_PRAGMAS": settings.SQLITE_PRAGMAS,
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == "sqlite":
+                # An in-memory test database has no file locking to measure
+                database["TEST"]["NAME"] = os.path.join(directory, "bench.sqlite3")
+
+            with isolated_database():
+                self.seed(options["employees"])
+                results = {
+                    "baseline": self.run_config(BASELINE, options),
+                    "tuned": self.run_config(tuned, options),
+                }
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10}{result['throughput_rps']:>10.1f} req/s"
+                f"  p50 {result['p50_ms']:.2f} ms  p95 {result['p95_ms']:.2f} ms"
+                f"  errors {result['errors']}"
+            )
+        speedup = (
+            results["tuned"]["throughput_rps"] / results["baseline"]["throughput_rps"]
+        )
+        self.stdout.write(f"tuned/baseline throughput: {speedup:.2f}x")
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+                output.write("\n")
+
+    def seed(self, employees):
+        admin = create_employees(1, prefix="bench.admin", role="admin")[0]
+        self.employee_ids = [
+            employee.pk for employee in create_employees(max(1, employees))
+        ]
+        self.access = str(
+            CustomTokenObtainPairSerializer.get_token(admin.user).access_token
+        )
+
+    def run_config(self, config, options):
+        """Time the workload with one set of connection settings"""
+        connections.close_all()
+        database = connections["default"].settings_dict
+        database["CONN_MAX_AGE"] = config["CONN_MAX_AGE"]
+        database["CONN_HEALTH_CHECKS"] = config["CONN_HEALTH_CHECKS"]
+
+        with override_settings(SQLITE_PRAGMAS=config["SQLITE_PRAGMAS"]):
+            # journal_mode is kept in the file, so set it before the run
+            connection.ensure_connection()
+            connection.close()
+
+            timings = []
+            errors = []
+            threads = [
+                threading.Thread(
+                    target=self.worker, args=(offset, options, timings, errors)
+                )
+                for offset in range(options["threads"])
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        return {**config, **summarize(timings, elapsed), "errors": len(errors)}
+
+    def worker(self, offset, options, timings, errors):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        try:
+            for index in range(options["requests"]):
+                pk = self.employee_ids[(offset + index) % len(self.employee_ids)]
+                started = time.perf_counter()
+                try:
+                    if index % options["write_every"] == 0:
+                        response = client.patch(
+                            f"/api/employees/{pk}/",
+                            {"position": f"Engineer {index}"},
+                            format="json",
+                        )
+                    else:
+                        response = client.get(f"/api/employees/{pk}/")
+                except Exception as exc:
+                    # "database is locked" surfaces here under contention
+                    errors.append(exc)
+                    continue
+                timings.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+        finally:
+            connection.close()
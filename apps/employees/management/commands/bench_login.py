@@ -0,0 +1,55 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import base_user
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.employees.benchmarks import create_employees, isolated_database
+
+
+class Command(BaseCommand):
+    help = "Measure password hash calls, queries and latency per login"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.run_benchmark(options["logins"])
+
+    def run_benchmark(self, logins):
+        create_employees(1, password="bench-pass-123", role="admin")
+
+        client = APIClient()
+        payload = {"username": "bench.user0", "password": "bench-pass-123"}
+        hash_calls = 0
+        query_count = 0
+        elapsed = 0.0
+
+        with mock.patch.object(
+            base_user, "check_password", wraps=base_user.check_password
+        ) as check, mock.patch.object(
+            base_user, "make_password", wraps=base_user.make_password
+        ) as make:
+            for _ in range(logins):
+                check.reset_mock()
+                make.reset_mock()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.post("/api/auth/login/", payload, format="json")
+                    elapsed += time.perf_counter() - started
+
+                if response.status_code != 200:
+                    self.stderr.write(f"Login failed: {response.status_code}")
+                    return
+
+                hash_calls += check.call_count + make.call_count
+                query_count += len(queries)
+
+        self.stdout.write(f"logins:            {logins}")
+        self.stdout.write(f"hash calls/login:  {hash_calls / logins:.1f}")
+        self.stdout.write(f"queries/login:     {query_count / logins:.1f}")
+        self.stdout.write(f"mean latency (ms): {elapsed / logins * 1000:.1f}")
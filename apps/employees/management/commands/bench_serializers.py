@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from apps.employees.benchmarks import create_employees, isolated_database
+from apps.employees.models import Employee
+from apps.employees.serializers import (
+    EMPLOYEE_LIST_FIELDS,
+    EmployeeListSerializer,
+    employee_list_representation,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare list rows/sec of EmployeeListSerializer and the values() path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            create_employees(options["employees"])
+            self.run_benchmark(options["employees"], options["repeat"])
+
+    def run_benchmark(self, count, repeat):
+        renderer = JSONRenderer()
+
+        def stock():
+            employees = Employee.objects.select_related("user").only(
+                *EMPLOYEE_LIST_FIELDS
+            )
+            return renderer.render(EmployeeListSerializer(employees, many=True).data)
+
+        def fast():
+            rows = Employee.objects.values(*EMPLOYEE_LIST_FIELDS)
+            return renderer.render([employee_list_representation(row) for row in rows])
+
+        if stock() != fast():
+            raise CommandError("values() path output differs from the serializer")
+
+        for label, render in [
+            ("EmployeeListSerializer", stock),
+            ("values() path", fast),
+        ]:
+            best = min(self.time(render) for _ in range(repeat))
+            self.stdout.write(
+                f"{label:<24} {count / best:>12,.0f} rows/sec  ({best * 1000:.1f} ms)"
+            )
+
+    def time(self, render):
+        started = time.perf_counter()
+        render()
+        return time.perf_counter() - started
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employees.api_keys import generate_api_key, hash_api_key
+from apps.employees.models import APIClient
+
+
+class Command(BaseCommand):
+    help = "Register a service that calls the X-API-Key endpoints and print its key"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="Name of the calling service")
+        parser.add_argument(
+            "--rotate",
+            action="store_true",
+            help=(
+                "Replace the key of an existing client; running servers accept "
+                "the old key for up to API_CLIENT_CACHE_TTL seconds"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        name = options["name"]
+        client = APIClient.objects.filter(name=name).first()
+        if client is not None and not options["rotate"]:
+            raise CommandError(f"API client {name!r} exists, pass --rotate")
+        if client is None:
+            if options["rotate"]:
+                raise CommandError(f"No API client named {name!r}")
+            client = APIClient(name=name)
+
+        prefix, key = generate_api_key()
+        client.key_prefix = prefix
+        client.key_hash = hash_api_key(key)
+        client.is_active = True
+        client.save()
+
+        self.stdout.write(self.style.SUCCESS(f"API client {name!r} key:"))
+        self.stdout.write(key)
+        self.stdout.write("Store it now, it cannot be shown again.")
@@ -0,0 +1,48 @@
+import os
+import secrets
+from datetime import date
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Create a JWT signing key in JWT_KEYS_DIR for rotation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--algorithm", choices=["RS256", "EdDSA"], default="RS256")
+        parser.add_argument("--kid", help="Key id, defaults to today's date")
+        parser.add_argument("--keys-dir", default=settings.JWT_KEYS_DIR)
+
+    def handle(self, *args, **options):
+        if not options["keys_dir"]:
+            raise CommandError("Set JWT_KEYS_DIR or pass --keys-dir")
+
+        kid = options["kid"] or f"{date.today().isoformat()}-{secrets.token_hex(2)}"
+        keys_dir = Path(options["keys_dir"])
+        keys_dir.mkdir(parents=True, exist_ok=True)
+        path = keys_dir / f"{kid}.pem"
+        if path.exists():
+            raise CommandError(f"{path} already exists")
+
+        if options["algorithm"] == "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as key_file:
+            key_file.write(pem)
+
+        self.stdout.write(self.style.SUCCESS(f"Created {path}"))
+        self.stdout.write(
+            f"Publish it for JWKS_MAX_AGE seconds, then set JWT_ACTIVE_KID={kid}"
+        )
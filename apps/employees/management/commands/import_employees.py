@@ -0,0 +1,68 @@
+import io
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employees.importing import EmployeeImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import employees from a CSV or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Defaults to csv for .csv files and jsonl otherwise",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.EMPLOYEE_IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.EMPLOYEE_IMPORT_WORKERS,
+            help="Password hashing processes, 0 or 1 to hash inline",
+        )
+        parser.add_argument(
+            "--unusable-passwords",
+            action="store_true",
+            help="Ignore passwords and create invite-only accounts",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        importer = EmployeeImporter(
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            unusable_passwords=options["unusable_passwords"],
+        )
+
+        try:
+            if path == "-":
+                stream = io.TextIOWrapper(
+                    sys.stdin.buffer,
+                    encoding="utf-8-sig",
+                    errors="surrogateescape",
+                    newline="",
+                )
+                report = importer.run(read_rows(stream, fmt))
+            else:
+                with open(
+                    path, newline="", encoding="utf-8-sig", errors="surrogateescape"
+                ) as stream:
+                    report = importer.run(read_rows(stream, fmt))
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for error in report["errors"]:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']} employees, {report['failed']} failed"
+            )
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.employees.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete deleted-employee tombstones past EMPLOYEE_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones"))
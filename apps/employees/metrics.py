@@ -0,0 +1,303 @@
+"""
+Per-request cost accounting, exposed in Prometheus text format
+
+RequestMetricsMiddleware records wall time, database queries and query
+time for every request. It also records the time spent hashing passwords
+and rendering serializers, reported through record_time(). Results are
+grouped by the resolved view, e.g. "EmployeeViewSet.list". Requests over
+their REQUEST_BUDGETS entry are logged as warnings.
+
+Numbers are aggregated per process and start from zero when it restarts.
+Behind a server with several workers on one port, each scrape reaches a
+random worker, so the counters jump between workers instead of adding up.
+Scrape each worker on its own address, or run a single worker, to get
+usable totals; rate() and histogram_quantile() over a mix of workers are
+not meaningful.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the request duration histogram, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Costs of the current request"""
+
+    __slots__ = (
+        "db_queries",
+        "db_seconds",
+        "password_hash_seconds",
+        "serializer_seconds",
+    )
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.password_hash_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's metrics"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_seconds += time.perf_counter() - start
+
+
+def install_query_counter(connection, **kwargs):
+    """
+    Add count_query to a connection's execute wrappers, once
+
+    Connections are per thread, and the async ORM runs queries in a worker
+    thread, so this also runs on connection_created for every new one. The
+    request's metrics follow it there through the context variable.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+@contextmanager
+def record_time(kind):
+    """Add the block's duration to the current request's "<kind>_seconds" """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        field = f"{kind}_seconds"
+        setattr(metrics, field, getattr(metrics, field) + time.perf_counter() - start)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.password_hash_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.budget_violations = 0
+        self.statuses = Counter()
+
+
+class MetricsRegistry:
+    """Per-endpoint aggregates of RequestMetrics for this process"""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, status_code, seconds, metrics, over_budget):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+
+            stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.count += 1
+            stats.seconds += seconds
+            stats.db_queries += metrics.db_queries
+            stats.db_seconds += metrics.db_seconds
+            stats.password_hash_seconds += metrics.password_hash_seconds
+            stats.serializer_seconds += metrics.serializer_seconds
+            stats.budget_violations += over_budget
+            stats.statuses[status_code] += 1
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """All aggregates in the Prometheus text exposition format"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            lines += [
+                "# HELP employees_request_duration_seconds Wall time of requests",
+                "# TYPE employees_request_duration_seconds histogram",
+            ]
+            for endpoint, stats in endpoints:
+                label = f'endpoint="{_escape(endpoint)}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(
+                        "employees_request_duration_seconds_bucket"
+                        f'{{{label},le="{bound}"}} {cumulative}'
+                    )
+                lines += [
+                    f'employees_request_duration_seconds_bucket{{{label},le="+Inf"}}'
+                    f" {stats.count}",
+                    f"employees_request_duration_seconds_sum{{{label}}} {stats.seconds}",
+                    f"employees_request_duration_seconds_count{{{label}}} {stats.count}",
+                ]
+
+            lines += [
+                "# HELP employees_requests_total Requests by response status",
+                "# TYPE employees_requests_total counter",
+            ]
+            for endpoint, stats in endpoints:
+                for status_code, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'employees_requests_total{{endpoint="{_escape(endpoint)}",'
+                        f'status="{status_code}"}} {count}'
+                    )
+
+            for name, attribute, help_text in (
+                ("db_queries_total", "db_queries", "Database queries"),
+                ("db_seconds_total", "db_seconds", "Time spent in database queries"),
+                (
+                    "password_hash_seconds_total",
+                    "password_hash_seconds",
+                    "Time spent waiting for password hashes",
+                ),
+                (
+                    "serializer_seconds_total",
+                    "serializer_seconds",
+                    "Time spent building response data",
+                ),
+                (
+                    "budget_violations_total",
+                    "budget_violations",
+                    "Requests over their REQUEST_BUDGETS entry",
+                ),
+            ):
+                lines += [
+                    f"# HELP employees_request_{name} {help_text}",
+                    f"# TYPE employees_request_{name} counter",
+                ]
+                for endpoint, stats in endpoints:
+                    lines.append(
+                        f'employees_request_{name}{{endpoint="{_escape(endpoint)}"}}'
+                        f" {getattr(stats, attribute)}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics_registry = MetricsRegistry()
+
+
+def endpoint_name(view_func, method):
+    """Label for a resolved view: ViewSet.action, APIView class or module.function"""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        module = view_func.__module__.rsplit(".", 1)[-1]
+        return f"{module}.{view_func.__name__}"
+
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        return f"{view_class.__name__}.{actions.get(method.lower(), method.lower())}"
+    return view_class.__name__
+
+
+def check_budget(endpoint, seconds, metrics):
+    """Log and report whether a request went over its budget"""
+    budget = settings.REQUEST_BUDGETS.get(endpoint)
+    if not budget:
+        return False
+
+    violations = []
+    if "ms" in budget and seconds * 1000 > budget["ms"]:
+        violations.append(f"{seconds * 1000:.1f} ms > {budget['ms']} ms")
+    if "queries" in budget and metrics.db_queries > budget["queries"]:
+        violations.append(f"{metrics.db_queries} queries > {budget['queries']}")
+
+    if violations:
+        logger.warning("%s over budget: %s", endpoint, ", ".join(violations))
+    return bool(violations)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every request and add it to metrics_registry
+
+    Put it first in MIDDLEWARE so the wall time covers the whole stack. For
+    streaming responses only the time to the first byte is measured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed()
+
+        connection_created.connect(install_query_counter)
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics, start, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, metrics, start)
+        return response
+
+    async def __acall__(self, request):
+        metrics, start, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, metrics, start)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_endpoint = endpoint_name(view_func, request.method)
+
+    def _start(self):
+        for alias in connections:
+            install_query_counter(connections[alias])
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        return metrics, time.perf_counter(), token
+
+    def _finish(self, request, response, metrics, start):
+        seconds = time.perf_counter() - start
+        endpoint = getattr(request, "metrics_endpoint", "unresolved")
+        over_budget = check_budget(endpoint, seconds, metrics)
+        metrics_registry.observe(
+            endpoint, response.status_code, seconds, metrics, over_budget
+        )
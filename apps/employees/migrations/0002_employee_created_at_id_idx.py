@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="employee",
+            options={"ordering": ["-created_at", "-id"]},
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["created_at", "id"], name="employee_created_at_id_idx"
+            ),
+        ),
+    ]
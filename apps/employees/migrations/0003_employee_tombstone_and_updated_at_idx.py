@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_employee_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployeeTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("employee_id", models.BigIntegerField()),
+                ("user_id", models.IntegerField()),
+                ("username", models.CharField(blank=True, max_length=150)),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["deleted_at", "id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["updated_at", "id"], name="employee_updated_at_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employeetombstone",
+            index=models.Index(
+                fields=["deleted_at", "id"], name="tombstone_deleted_at_id_idx"
+            ),
+        ),
+    ]
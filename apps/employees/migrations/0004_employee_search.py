@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:30
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_search_text(value):
+    # Frozen copy of apps.employees.models.normalize_search_text
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def backfill_search_name(apps, schema_editor):
+    Employee = apps.get_model("employees", "Employee")
+    employees = list(Employee.objects.only("id", "name"))
+    for employee in employees:
+        employee.search_name = normalize_search_text(employee.name)
+    Employee.objects.bulk_update(employees, ["search_name"], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS employee_search_name_trgm "
+        "ON employees_employee USING gin (search_name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS employee_search_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0003_employee_tombstone_and_updated_at_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="search_name",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["search_name", "id"], name="employee_search_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(fields=["phone"], name="employee_phone_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(fields=["position"], name="employee_position_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["role", "join_date"], name="employee_role_join_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(fields=["join_date"], name="employee_join_date_idx"),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0004_employee_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "jti",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0005_revoked_token"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="APIClient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("key_prefix", models.CharField(max_length=16, unique=True)),
+                ("key_hash", models.CharField(max_length=64)),
+                ("is_active", models.BooleanField(default=True)),
+                ("request_count", models.BigIntegerField(default=0)),
+                ("last_used_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "API client",
+                "ordering": ["name"],
+            },
+        ),
+    ]
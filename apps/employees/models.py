@@ -1,7 +1,16 @@
+import unicodedata
+
 from django.db import models
 from django.contrib.auth.models import User
 
 
+def normalize_search_text(value):
+    """Lowercase, accent-free, single-spaced text for prefix searches"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
 class Employee(models.Model):
     ROLE_CHOICES = [
         ("employee", "Employee"),
@@ -10,6 +19,8 @@ class Employee(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="employee")
     name = models.CharField(max_length=200)
+    # normalize_search_text(name), kept in sync by save() for indexed prefix search
+    search_name = models.CharField(max_length=200, blank=True, editable=False)
     phone = models.CharField(max_length=20)
     address = models.TextField()
     emergency_contact = models.CharField(max_length=20)
@@ -21,11 +32,90 @@ class Employee(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Backs the default ordering and keyset (cursor) pagination
+            models.Index(
+                fields=["created_at", "id"], name="employee_created_at_id_idx"
+            ),
+            # Backs the /api/employees/changes/ delta feed
+            models.Index(
+                fields=["updated_at", "id"], name="employee_updated_at_id_idx"
+            ),
+            # Back the list filters; PostgreSQL also gets a trigram index on
+            # search_name in migration 0004
+            models.Index(fields=["search_name", "id"], name="employee_search_name_idx"),
+            models.Index(fields=["phone"], name="employee_phone_idx"),
+            models.Index(fields=["position"], name="employee_position_idx"),
+            models.Index(fields=["role", "join_date"], name="employee_role_join_idx"),
+            models.Index(fields=["join_date"], name="employee_join_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.position})"
 
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "search_name"}
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == "admin"
+
+
+class EmployeeTombstone(models.Model):
+    """Record of a deleted employee so delta syncs can report the deletion"""
+
+    employee_id = models.BigIntegerField()
+    user_id = models.IntegerField()
+    username = models.CharField(max_length=150, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["deleted_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["deleted_at", "id"], name="tombstone_deleted_at_id_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Deleted employee {self.employee_id} ({self.username})"
+
+
+class RevokedToken(models.Model):
+    """A refresh token jti that may no longer be used, kept until it expires"""
+
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class APIClient(models.Model):
+    """
+    A service allowed to call the X-API-Key endpoints
+
+    Keys look like "<key_prefix>.<secret>". Only the prefix, which is how a
+    key is looked up, and a SHA-256 of the whole key are stored.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    key_prefix = models.CharField(max_length=16, unique=True)
+    key_hash = models.CharField(max_length=64)
+    is_active = models.BooleanField(default=True)
+    # Flushed in batches by apps.employees.api_keys.api_client_stats
+    request_count = models.BigIntegerField(default=0)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "API client"
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class EmployeeCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the (created_at, id) index
+
+    Each page is an indexed range scan without COUNT(*) or OFFSET, so it
+    costs the same however deep the client scrolls.
+    """
+
+    ordering = ("-created_at", "-id")
+
+
+def wants_cursor_pagination(request):
+    """True for ?pagination=cursor and for the next/previous links it returns"""
+    params = request.query_params
+    return (
+        params.get("pagination") == "cursor"
+        or EmployeeCursorPagination.cursor_query_param in params
+    )
@@ -1,5 +1,6 @@
 from rest_framework import permissions
-from django.conf import settings
+from rest_framework_simplejwt.models import TokenUser
+from .api_keys import api_client_stats, authenticate_api_key
 
 
 class IsAdmin(permissions.BasePermission):
@@ -13,6 +14,10 @@ class IsAdmin(permissions.BasePermission):
         if request.user.is_staff or request.user.is_superuser:
             return True
 
+        # Trust the signed role claim for stateless token users
+        if isinstance(request.user, TokenUser):
+            return bool(request.user.is_admin)
+
         # Check employee admin role
         try:
             return request.user.employee.is_admin
@@ -28,21 +33,32 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         if request.user.is_staff or request.user.is_superuser:
             return True
 
-        try:
-            if request.user.employee.is_admin:
+        if isinstance(request.user, TokenUser):
+            if request.user.is_admin:
                 return True
-        except:
-            pass
+        else:
+            try:
+                if request.user.employee.is_admin:
+                    return True
+            except:
+                pass
 
         # Employees can only access their own record
-        return obj.user == request.user
+        return obj.user_id == request.user.id
 
 
 class HasAdminAPIKey(permissions.BasePermission):
-    """Check for valid admin API key in request headers"""
+    """
+    Check the X-API-Key header against the API client registry
+
+    The caller is kept on request.api_client and counted in its stats.
+    """
 
     def has_permission(self, request, view):
-        api_key = request.headers.get("X-API-Key")
-        if api_key and api_key == settings.ADMIN_API_KEY:
-            return True
-        return False
+        client = authenticate_api_key(request.headers.get("X-API-Key"))
+        if client is None:
+            return False
+
+        request.api_client = client
+        api_client_stats.record(client)
+        return True
@@ -0,0 +1,145 @@
+"""
+Single-use refresh tokens
+
+A refresh token's jti is revoked when it is used. With REVOKED_TOKEN_STORE
+"database", a RevokedToken insert decides which of two concurrent uses
+wins, and expired rows are pruned every REVOKED_TOKEN_PRUNE_INTERVAL
+seconds by whichever refresh comes first. With "cache", an atomic
+cache.add() on the shared cache decides instead, and refreshes write no
+rows at all. That needs a cache shared by every process (Redis or
+Memcached), and a used token can be replayed if its entry is evicted
+before it expires.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone as django_timezone
+
+from .cache import LRUCache
+from .models import RevokedToken
+
+# jtis this process has seen revoked, so replays are rejected without I/O
+revoked_local_cache = LRUCache(
+    maxsize=settings.REVOKED_TOKEN_LOCAL_CACHE_SIZE,
+    ttl=settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds(),
+)
+
+
+PRUNE_KEY = "employees:revoked_jti_prune"
+
+_next_prune_check = float("-inf")
+_prune_lock = threading.Lock()
+
+
+def _revoked_key(jti):
+    return f"employees:revoked_jti:{jti}"
+
+
+def _remaining_seconds(exp):
+    return max(0, exp - int(datetime.now(timezone.utc).timestamp()))
+
+
+def _insert_revoked_token(jti, exp):
+    """Insert the RevokedToken row; False if the jti already had one"""
+    expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
+    try:
+        # A savepoint, so a duplicate leaves an enclosing transaction usable
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def is_revoked(jti):
+    """Check the local set and the shared deny-list; never queries the database"""
+    if revoked_local_cache.get(jti):
+        return True
+    return bool(cache.get(_revoked_key(jti)))
+
+
+def revoke(jti, exp):
+    """
+    Revoke a token jti until its exp timestamp
+
+    The insert into RevokedToken, or the cache.add() with the "cache"
+    store, is the point of truth: it fails if the jti was already revoked,
+    also by a concurrent request in another process, so each refresh token
+    can be used exactly once. Returns False in that case.
+    """
+    remaining = _remaining_seconds(exp)
+    if settings.REVOKED_TOKEN_STORE == "cache":
+        revoked = cache.add(_revoked_key(jti), True, max(1, remaining))
+    else:
+        revoked = _insert_revoked_token(jti, exp)
+        if remaining:
+            cache.set(_revoked_key(jti), True, remaining)
+        if _prune_check_due() and cache.add(
+            PRUNE_KEY, True, settings.REVOKED_TOKEN_PRUNE_INTERVAL
+        ):
+            prune_revoked_tokens()
+
+    if remaining:
+        revoked_local_cache.set(jti, True, ttl=remaining)
+    return revoked
+
+
+async def ais_revoked(jti):
+    """is_revoked() for async views"""
+    if revoked_local_cache.get(jti):
+        return True
+    return bool(await cache.aget(_revoked_key(jti)))
+
+
+async def arevoke(jti, exp):
+    """revoke() for async views, with the same exactly-once guarantee"""
+    remaining = _remaining_seconds(exp)
+    if settings.REVOKED_TOKEN_STORE == "cache":
+        revoked = await cache.aadd(_revoked_key(jti), True, max(1, remaining))
+    else:
+        revoked = await sync_to_async(_insert_revoked_token)(jti, exp)
+        if remaining:
+            await cache.aset(_revoked_key(jti), True, remaining)
+        if _prune_check_due() and await cache.aadd(
+            PRUNE_KEY, True, settings.REVOKED_TOKEN_PRUNE_INTERVAL
+        ):
+            await RevokedToken.objects.filter(
+                expires_at__lt=django_timezone.now()
+            ).adelete()
+
+    if remaining:
+        revoked_local_cache.set(jti, True, ttl=remaining)
+    return revoked
+
+
+def _prune_check_due():
+    """
+    True at most once per REVOKED_TOKEN_PRUNE_INTERVAL in this process
+
+    The caller then claims PRUNE_KEY in the shared cache, so only one
+    process prunes per interval.
+    """
+    global _next_prune_check
+    if settings.REVOKED_TOKEN_PRUNE_INTERVAL <= 0:
+        return False
+
+    with _prune_lock:
+        now = time.monotonic()
+        if now < _next_prune_check:
+            return False
+        _next_prune_check = now + settings.REVOKED_TOKEN_PRUNE_INTERVAL
+        return True
+
+
+def prune_revoked_tokens():
+    """Delete revoked tokens that have expired anyway; returns the count"""
+    deleted, _ = RevokedToken.objects.filter(
+        expires_at__lt=django_timezone.now()
+    ).delete()
+    return deleted
@@ -1,7 +1,52 @@
+import time
+
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenObtainSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from .hashing import check_password, hash_password
+from .last_login import last_login_recorder
 from .models import Employee
+from .revocation import is_revoked, revoke
+
+
+def get_employee_claims(user):
+    """Role, display name and admin flag for a user, used in tokens and login responses"""
+    try:
+        employee = user.employee
+    except Employee.DoesNotExist:
+        return {
+            "role": "employee",
+            "name": user.username,
+            "is_admin": user.is_staff or user.is_superuser,
+        }
+
+    return {
+        "role": employee.role,
+        "name": employee.name,
+        "is_admin": employee.is_admin,
+    }
+
+
+def set_token_claims(token, user):
+    """Add role claims to a token and stamp when they were read from the database"""
+    for claim, value in get_employee_claims(user).items():
+        token[claim] = value
+
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token["claims_iat"] = int(time.time())
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -12,18 +57,68 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
 
         # Add custom claims
-        try:
-            employee = user.employee
-            token["role"] = employee.role
-            token["name"] = employee.name
-            token["is_admin"] = employee.is_admin
-        except Employee.DoesNotExist:
-            token["role"] = "employee"
-            token["name"] = user.username
-            token["is_admin"] = user.is_staff or user.is_superuser
+        set_token_claims(token, user)
 
         return token
 
+    def validate(self, attrs):
+        # TokenObtainPairSerializer.validate() without its synchronous
+        # last_login UPDATE
+        TokenObtainSerializer.validate(self, attrs)
+        refresh = self.get_token(self.user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+        if api_settings.UPDATE_LAST_LOGIN:
+            last_login_recorder.record(self.user)
+
+        # Reuse the user authenticated above instead of authenticating again
+        data.update(get_employee_claims(self.user))
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rotate refresh tokens and re-read role claims on refresh
+
+    Each refresh token is revoked as it is used, so a replayed or leaked
+    token is rejected. Role claims are re-read so stateless authorization
+    stays current.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        jti = refresh[api_settings.JTI_CLAIM]
+        if is_revoked(jti) or not revoke(jti, refresh["exp"]):
+            raise InvalidToken(_("Token is blacklisted"))
+
+        user = (
+            User.objects.select_related("employee")
+            .filter(
+                **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+            )
+            .first()
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+
+        return refreshed_token_data(refresh, user)
+
+
+def refreshed_token_data(refresh, user):
+    """New access token with fresh claims, and the rotated refresh token"""
+    access = refresh.access_token
+    set_token_claims(access, user)
+    data = {"access": str(access)}
+
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data["refresh"] = str(refresh)
+    return data
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -67,9 +162,11 @@ class EmployeeSerializer(serializers.ModelSerializer):
         email = validated_data.pop("email", None)
         password = validated_data.pop("password", None)
 
-        # Create user
-        user = User.objects.create_user(
-            username=username, email=email, password=password
+        # Create user, hashing the password in the hashing pool
+        user = User.objects.create(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(email),
+            password=hash_password(password),
         )
 
         # Create employee
@@ -77,6 +174,45 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return employee
 
 
+class EmployeeImportSerializer(serializers.ModelSerializer):
+    """Validates one bulk import row without touching the database"""
+
+    username = serializers.CharField(
+        max_length=150, validators=[UnicodeUsernameValidator()]
+    )
+    email = serializers.EmailField(required=False, allow_blank=True)
+    password = serializers.CharField(required=False, allow_blank=True)
+
+    class Meta:
+        model = Employee
+        fields = [
+            "username",
+            "email",
+            "password",
+            "name",
+            "phone",
+            "address",
+            "emergency_contact",
+            "salary",
+            "position",
+            "role",
+            "join_date",
+        ]
+
+
+# Columns read by EmployeeListSerializer, for only() or values() on list querysets
+EMPLOYEE_LIST_FIELDS = [
+    "id",
+    "user__username",
+    "user__email",
+    "name",
+    "phone",
+    "position",
+    "role",
+    "join_date",
+]
+
+
 class EmployeeListSerializer(serializers.ModelSerializer):
     """Simplified serializer for listing employees"""
 
@@ -99,13 +235,43 @@ class EmployeeListSerializer(serializers.ModelSerializer):
         ]
 
 
+_list_date_field = serializers.DateField()
+
+
+def employee_list_representation(row):
+    """
+    EmployeeListSerializer output for a values(*EMPLOYEE_LIST_FIELDS) row
+
+    Renders the same data without per-field serializer dispatch, which
+    dominates CPU time on large lists. Extra keys in the row are ignored.
+    """
+    return {
+        "id": row["id"],
+        "username": row["user__username"],
+        "email": row["user__email"],
+        "name": row["name"],
+        "phone": row["phone"],
+        "position": row["position"],
+        "role": row["role"],
+        "is_admin": row["role"] == "admin",
+        "join_date": _list_date_field.to_representation(row["join_date"]),
+    }
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True, write_only=True)
     new_password = serializers.CharField(required=True, write_only=True)
 
-    def validate_old_password(self, value):
+    @cached_property
+    def user(self):
         user = self.context["request"].user
-        if not user.check_password(value):
+        # Stateless token users carry no password hash, so load the real row
+        if isinstance(user, TokenUser):
+            user = User.objects.get(pk=user.id)
+        return user
+
+    def validate_old_password(self, value):
+        if not check_password(self.user, value):
             raise serializers.ValidationError("Old password is incorrect")
         return value
 
@@ -117,7 +283,26 @@ class ChangePasswordSerializer(serializers.Serializer):
         return value
 
     def save(self):
-        user = self.context["request"].user
-        user.set_password(self.validated_data["new_password"])
-        user.save()
-        return user
+        self.user.password = hash_password(self.validated_data["new_password"])
+        self.user.save()
+        return self.user
+
+
+class VerifyAdminBatchSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+    usernames = serializers.ListField(
+        child=serializers.CharField(), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        count = len(attrs["user_ids"]) + len(attrs["usernames"])
+        if not count:
+            raise serializers.ValidationError("user_ids or usernames is required")
+        if count > settings.VERIFY_ADMIN_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"At most {settings.VERIFY_ADMIN_BATCH_MAX_SIZE} users can be "
+                "verified per request"
+            )
+        return attrs
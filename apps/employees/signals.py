@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .api_keys import invalidate_api_client
+from .authentication import invalidate_user_tokens
+from .cache import invalidate_admin_status
+from .models import APIClient, Employee, EmployeeTombstone
+
+# User columns that are part of neither verify_admin results nor the
+# employee record, so saving only these skips invalidation
+NON_PROFILE_USER_FIELDS = {"last_login", "password"}
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_employee_admin_status(sender, instance, **kwargs):
+    if Employee.user.is_cached(instance):
+        username = instance.user.username
+    elif settings.DB_REPLICAS:
+        # Lookups by username must be pinned to the primary as well
+        username = (
+            User.objects.filter(pk=instance.user_id)
+            .values_list("username", flat=True)
+            .first()
+        )
+    else:
+        username = None
+    invalidate_admin_status(instance.user_id, username)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_admin_status(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, and password on a hash upgrade
+    if update_fields and set(update_fields) <= NON_PROFILE_USER_FIELDS:
+        return
+    invalidate_admin_status(instance.pk, instance.username)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user_tokens(
+    sender, instance, created=False, update_fields=None, **kwargs
+):
+    # Unlike the receivers above, a password change must drop cached tokens
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def touch_employee_on_user_change(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    # Username and email are part of the employee record seen by delta syncs
+    if created or (update_fields and set(update_fields) <= NON_PROFILE_USER_FIELDS):
+        return
+    Employee.objects.filter(user_id=instance.pk).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Employee)
+def record_employee_tombstone(sender, instance, **kwargs):
+    username = instance.user.username if Employee.user.is_cached(instance) else ""
+    EmployeeTombstone.objects.create(
+        employee_id=instance.pk, user_id=instance.user_id, username=username
+    )
+
+
+@receiver(post_delete, sender=User)
+def complete_employee_tombstone(sender, instance, **kwargs):
+    # Employees deleted through a user cascade do not have the user loaded
+    EmployeeTombstone.objects.filter(user_id=instance.pk, username="").update(
+        username=instance.username
+    )
+
+
+@receiver([post_save, post_delete], sender=APIClient)
+def invalidate_cached_api_client(sender, instance, **kwargs):
+    # Other processes pick up the change within API_CLIENT_CACHE_TTL
+    invalidate_api_client(instance.key_prefix)
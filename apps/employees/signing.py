@@ -0,0 +1,163 @@
+"""
+Asymmetric JWT signing with key IDs
+
+Keys live in JWT_KEYS_DIR as PEM files named after their key id: <kid>.pem
+holds a private key that can sign, <kid>.pub.pem a retired public key that
+only verifies. JWT_ACTIVE_KID picks the signing key. Every key is published
+at /.well-known/jwks.json, so services can verify tokens offline.
+
+Rotation: add the new private key, wait for JWKS_MAX_AGE so caches pick it
+up, switch JWT_ACTIVE_KID, and once the refresh token lifetime has passed
+replace the old private key with its .pub.pem (or remove it).
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    public_key: object
+    private_key: object = None
+
+    def to_jwk(self):
+        if self.algorithm == "EdDSA":
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            jwk = RSAAlgorithm.to_jwk(self.public_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def _algorithm_for(public_key):
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RS256"
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "EdDSA"
+    raise ImproperlyConfigured(
+        f"Unsupported JWT key type {type(public_key).__name__}, use RSA or Ed25519"
+    )
+
+
+def load_keys(keys_dir):
+    """Keys in a directory by kid, private keys from <kid>.pem, public from <kid>.pub.pem"""
+    keys = {}
+    for path in sorted(Path(keys_dir).glob("*.pem")):
+        data = path.read_bytes()
+        if path.name.endswith(".pub.pem"):
+            kid = path.name[: -len(".pub.pem")]
+            private_key = None
+            public_key = serialization.load_pem_public_key(data)
+        else:
+            kid = path.stem
+            private_key = serialization.load_pem_private_key(data, password=None)
+            public_key = private_key.public_key()
+
+        # A private key wins over a leftover public copy of itself
+        if kid in keys and keys[kid].private_key is not None:
+            continue
+        keys[kid] = SigningKey(kid, _algorithm_for(public_key), public_key, private_key)
+    return keys
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    TokenBackend that signs with the active key and verifies by "kid" header
+
+    Tokens signed by any published key verify, which gives rotation its
+    overlap window.
+    """
+
+    def __init__(self, keys, active_kid, **kwargs):
+        active = keys.get(active_kid)
+        if active is None or active.private_key is None:
+            raise ImproperlyConfigured(
+                f"JWT_ACTIVE_KID {active_kid!r} has no private key in JWT_KEYS_DIR"
+            )
+
+        super().__init__(active.algorithm, signing_key=active.private_key, **kwargs)
+        self.keys = keys
+        self.active = active
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            self.active.private_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+
+        key = self.keys.get(kid)
+        if key is None:
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+        try:
+            return jwt.decode(
+                token,
+                key.public_key,
+                algorithms=[key.algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except jwt.InvalidTokenError as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+
+    def get_jwks(self):
+        return {"keys": [key.to_jwk() for key in self.keys.values()]}
+
+
+def install_token_backend(settings):
+    """Make simplejwt sign and verify with the key ring when JWT_KEYS_DIR is set"""
+    if not settings.JWT_KEYS_DIR:
+        return
+
+    from rest_framework_simplejwt import state
+    from rest_framework_simplejwt.settings import api_settings
+
+    state.token_backend = KeyRingTokenBackend(
+        load_keys(settings.JWT_KEYS_DIR),
+        settings.JWT_ACTIVE_KID,
+        audience=api_settings.AUDIENCE,
+        issuer=api_settings.ISSUER,
+        leeway=api_settings.LEEWAY,
+        json_encoder=api_settings.JSON_ENCODER,
+    )
+
+
+def get_jwks():
+    """Public keys of the installed key ring as a JWK Set"""
+    from rest_framework_simplejwt import state
+
+    backend = state.token_backend
+    if isinstance(backend, KeyRingTokenBackend):
+        return backend.get_jwks()
+    # Symmetric keys must never be published
+    return {"keys": []}
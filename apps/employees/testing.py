@@ -0,0 +1,59 @@
+"""
+Query-count assertions for the employee endpoints
+
+Usage in a test:
+
+    with assert_endpoint_queries("employee-list"):
+        client.get("/api/employees/")
+
+tests/test_queries.py runs every endpoint below under it.
+"""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Queries per request on a token's first use, when CachedJWTAuthentication
+# loads the user; later requests with the same token run one query fewer.
+# Page sizes do not change these numbers, so an N+1 shows up at once.
+ENDPOINT_QUERIES = {
+    # user, employee for IsAdmin, COUNT(*), page
+    "employee-list": 4,
+    # user, employee for IsAdmin, page (?pagination=cursor has no COUNT)
+    "employee-list-cursor": 3,
+    # user, employee with its user, employee for IsOwnerOrAdmin
+    "employee-detail": 3,
+    # If-None-Match that still matches: user, narrow employee row,
+    # employee for IsOwnerOrAdmin
+    "employee-detail-not-modified": 3,
+    # user, employee with its user
+    "employee-me": 2,
+    # If-None-Match that still matches: user, narrow employee row
+    "employee-me-not-modified": 2,
+    # cold verify_admin cache, API client already cached: employee with its user
+    "employee-verify-admin": 1,
+}
+
+
+@contextmanager
+def assert_num_queries(expected, using=DEFAULT_DB_ALIAS):
+    """Fail if the block does not run exactly ``expected`` queries"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    if executed != expected:
+        queries = "\n".join(
+            f"{index}. {query['sql']}"
+            for index, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f"{executed} queries executed, {expected} expected\n"
+            f"Captured queries were:\n{queries}"
+        )
+
+
+def assert_endpoint_queries(endpoint, using=DEFAULT_DB_ALIAS):
+    """assert_num_queries with the budget recorded for a URL name"""
+    return assert_num_queries(ENDPOINT_QUERIES[endpoint], using=using)
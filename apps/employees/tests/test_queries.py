@@ -0,0 +1,143 @@
+from datetime import date
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.employees.api_keys import (
+    api_client_local_cache,
+    api_client_negative_cache,
+    api_client_stats,
+    generate_api_key,
+    hash_api_key,
+)
+from apps.employees.authentication import token_auth_local_cache
+from apps.employees.cache import admin_status_local_cache
+from apps.employees.last_login import last_login_recorder
+from apps.employees.models import APIClient as APIClientModel
+from apps.employees.models import Employee
+from apps.employees.serializers import CustomTokenObtainPairSerializer
+from apps.employees.testing import assert_endpoint_queries
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class EndpointQueryTests(TestCase):
+    """Each endpoint runs the number of queries recorded in ENDPOINT_QUERIES"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = cls.create_employee("admin", role="admin")
+        cls.employee = cls.create_employee("employee")
+        for index in range(20):
+            cls.create_employee(f"employee{index}")
+
+        prefix, cls.api_key = generate_api_key()
+        APIClientModel.objects.create(
+            name="tests", key_prefix=prefix, key_hash=hash_api_key(cls.api_key)
+        )
+
+    @staticmethod
+    def create_employee(username, role="employee"):
+        user = User.objects.create_user(
+            username=username, email=f"{username}@example.com", password="pass-12345"
+        )
+        return Employee.objects.create(
+            user=user,
+            name=username.title(),
+            phone="0000000000",
+            address="-",
+            emergency_contact="0000000000",
+            salary="1000.00",
+            position="Engineer",
+            role=role,
+            join_date=date(2024, 1, 1),
+        )
+
+    def setUp(self):
+        for local_cache in (
+            token_auth_local_cache,
+            admin_status_local_cache,
+            api_client_local_cache,
+            api_client_negative_cache,
+        ):
+            local_cache.clear()
+        cache.clear()
+        api_client_stats.clear()
+        last_login_recorder.clear()
+
+    def tearDown(self):
+        api_client_stats.clear()
+        last_login_recorder.clear()
+
+    def client_for(self, employee):
+        """A client with a fresh access token, so its first use is cold"""
+        token = CustomTokenObtainPairSerializer.get_token(employee.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+        return client
+
+    def test_list(self):
+        client = self.client_for(self.admin)
+        with assert_endpoint_queries("employee-list"):
+            response = client.get(reverse("employee-list"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_cursor(self):
+        client = self.client_for(self.admin)
+        with assert_endpoint_queries("employee-list-cursor"):
+            response = client.get(reverse("employee-list"), {"pagination": "cursor"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail(self):
+        client = self.client_for(self.admin)
+        with assert_endpoint_queries("employee-detail"):
+            response = client.get(reverse("employee-detail", args=[self.employee.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_not_modified(self):
+        url = reverse("employee-detail", args=[self.employee.pk])
+        etag = self.client_for(self.admin).get(url)["ETag"]
+
+        client = self.client_for(self.admin)
+        with assert_endpoint_queries("employee-detail-not-modified"):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @skipIf(settings.ASYNC_AUTH_VIEWS, "budgets are for the DRF views")
+    def test_me(self):
+        client = self.client_for(self.employee)
+        with assert_endpoint_queries("employee-me"):
+            response = client.get(reverse("employee-me"))
+        self.assertEqual(response.status_code, 200)
+
+    @skipIf(settings.ASYNC_AUTH_VIEWS, "budgets are for the DRF views")
+    def test_me_not_modified(self):
+        etag = self.client_for(self.employee).get(reverse("employee-me"))["ETag"]
+
+        client = self.client_for(self.employee)
+        with assert_endpoint_queries("employee-me-not-modified"):
+            response = client.get(reverse("employee-me"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @skipIf(settings.ASYNC_AUTH_VIEWS, "budgets are for the DRF views")
+    def test_verify_admin(self):
+        client = APIClient()
+        client.credentials(HTTP_X_API_KEY=self.api_key)
+        url = reverse("employee-verify-admin")
+        # Loads the API client into its cache
+        client.post(url, {"user_id": self.employee.user_id}, format="json")
+
+        with assert_endpoint_queries("employee-verify-admin"):
+            response = client.post(url, {"user_id": self.admin.user_id}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_admin"])
+
+    def test_warm_token_runs_one_query_fewer(self):
+        client = self.client_for(self.employee)
+        client.get(reverse("employee-me"))
+        with self.assertNumQueries(1):
+            client.get(reverse("employee-me"))
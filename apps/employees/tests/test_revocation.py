@@ -0,0 +1,196 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from apps.employees import async_views, revocation
+from apps.employees.models import Employee, RevokedToken
+from apps.employees.revocation import prune_revoked_tokens, revoked_local_cache
+from apps.employees.serializers import (
+    CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
+)
+
+
+# Savepoints of the test transaction count against the request budgets
+@override_settings(REQUEST_BUDGETS={})
+class RevocationTestCase(TestCase):
+    """An employee to issue refresh tokens for, with no jtis revoked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="employee", email="employee@example.com", password="pass-12345"
+        )
+        Employee.objects.create(
+            user=cls.user,
+            name="Employee",
+            phone="0000000000",
+            address="-",
+            emergency_contact="0000000000",
+            salary="1000.00",
+            position="Engineer",
+            join_date=date(2024, 1, 1),
+        )
+
+    def setUp(self):
+        revoked_local_cache.clear()
+        cache.clear()
+        # Let the first revoke() of each test check for expired rows
+        revocation._next_prune_check = float("-inf")
+
+    def refresh_token(self):
+        return str(CustomTokenObtainPairSerializer.get_token(self.user))
+
+    def post_refresh(self, token):
+        return APIClient().post(
+            reverse("token_refresh"), {"refresh": token}, format="json"
+        )
+
+    def forget_revocations(self):
+        """Drop revoked jtis from every cache but the store of record"""
+        revoked_local_cache.clear()
+        if settings.REVOKED_TOKEN_STORE == "database":
+            cache.clear()
+
+    def create_revoked_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="expired", expires_at=now - timedelta(1))
+        RevokedToken.objects.create(jti="current", expires_at=now + timedelta(1))
+
+
+class RefreshRevocationTests(RevocationTestCase):
+    """Refresh tokens can be used once, with either store"""
+
+    def test_rotated_token_is_rejected(self):
+        token = self.refresh_token()
+        response = self.post_refresh(token)
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()["refresh"]
+        self.assertNotEqual(rotated, token)
+
+        self.assertEqual(self.post_refresh(token).status_code, 401)
+        self.assertEqual(self.post_refresh(rotated).status_code, 200)
+
+    def test_database_rejects_replay_missing_from_caches(self):
+        token = self.refresh_token()
+        self.assertEqual(self.post_refresh(token).status_code, 200)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+        self.forget_revocations()
+        self.assertEqual(self.post_refresh(token).status_code, 401)
+
+    @override_settings(REVOKED_TOKEN_STORE="cache")
+    def test_cache_store(self):
+        token = self.refresh_token()
+        self.assertEqual(self.post_refresh(token).status_code, 200)
+        self.assertFalse(RevokedToken.objects.exists())
+
+        # The shared cache entry alone rejects the replay
+        self.forget_revocations()
+        self.assertEqual(self.post_refresh(token).status_code, 401)
+
+    def test_prune_deletes_only_expired(self):
+        self.create_revoked_tokens()
+        self.assertEqual(prune_revoked_tokens(), 1)
+        self.assertQuerySetEqual(
+            RevokedToken.objects.values_list("jti", flat=True), ["current"]
+        )
+
+    def test_prune_command_deletes_only_expired(self):
+        self.create_revoked_tokens()
+        stdout = StringIO()
+        call_command("prune_revoked_tokens", stdout=stdout)
+        self.assertIn("Deleted 1 expired tokens", stdout.getvalue())
+        self.assertQuerySetEqual(
+            RevokedToken.objects.values_list("jti", flat=True), ["current"]
+        )
+
+    def test_refresh_prunes_once_per_interval(self):
+        self.create_revoked_tokens()
+        self.assertEqual(self.post_refresh(self.refresh_token()).status_code, 200)
+        self.assertFalse(RevokedToken.objects.filter(jti="expired").exists())
+
+        RevokedToken.objects.create(
+            jti="expired-later", expires_at=timezone.now() - timedelta(1)
+        )
+        self.assertEqual(self.post_refresh(self.refresh_token()).status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(jti="expired-later").exists())
+
+
+class AsyncRefreshRevocationTests(RevocationTestCase):
+    """async_views.refresh and the DRF serializer share one deny-list"""
+
+    async def async_refresh(self, token):
+        request = AsyncRequestFactory().post(
+            reverse("token_refresh"),
+            {"refresh": token},
+            content_type="application/json",
+        )
+        return await async_views.refresh(request)
+
+    def assert_serializer_rejects(self, token):
+        serializer = CustomTokenRefreshSerializer(data={"refresh": token})
+        with self.assertRaises(InvalidToken):
+            serializer.is_valid()
+
+    async def test_async_rotated_token_is_rejected(self):
+        token = self.refresh_token()
+        response = await self.async_refresh(token)
+        self.assertEqual(response.status_code, 200)
+        rotated = json.loads(response.content)["refresh"]
+
+        self.assertEqual((await self.async_refresh(token)).status_code, 401)
+        self.assertEqual((await self.async_refresh(rotated)).status_code, 200)
+
+    async def test_async_database_rejects_replay_missing_from_caches(self):
+        token = self.refresh_token()
+        self.assertEqual((await self.async_refresh(token)).status_code, 200)
+        self.assertEqual(await RevokedToken.objects.acount(), 1)
+
+        self.forget_revocations()
+        self.assertEqual((await self.async_refresh(token)).status_code, 401)
+
+    @override_settings(REVOKED_TOKEN_STORE="cache")
+    async def test_async_cache_store(self):
+        token = self.refresh_token()
+        self.assertEqual((await self.async_refresh(token)).status_code, 200)
+        self.assertFalse(await RevokedToken.objects.aexists())
+
+        self.forget_revocations()
+        self.assertEqual((await self.async_refresh(token)).status_code, 401)
+
+    async def test_async_refresh_prunes_expired(self):
+        await sync_to_async(self.create_revoked_tokens)()
+        self.assertEqual(
+            (await self.async_refresh(self.refresh_token())).status_code, 200
+        )
+        self.assertFalse(await RevokedToken.objects.filter(jti="expired").aexists())
+        self.assertTrue(await RevokedToken.objects.filter(jti="current").aexists())
+
+    def test_token_revoked_by_one_view_is_rejected_by_the_other(self):
+        for store in ("database", "cache"):
+            with self.subTest(store=store), override_settings(
+                REVOKED_TOKEN_STORE=store
+            ):
+                token = self.refresh_token()
+                response = async_to_sync(self.async_refresh)(token)
+                self.assertEqual(response.status_code, 200)
+                self.forget_revocations()
+                self.assert_serializer_rejects(token)
+
+                token = self.refresh_token()
+                self.assertEqual(self.post_refresh(token).status_code, 200)
+                self.forget_revocations()
+                response = async_to_sync(self.async_refresh)(token)
+                self.assertEqual(response.status_code, 401)
@@ -0,0 +1,195 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.employees.last_login import last_login_recorder
+from apps.employees.models import Employee
+from apps.employees.throttling import LoginUsernameThrottle, SlidingWindowThrottle
+
+# The start of a rate window, so tests pick where in it they land
+WINDOW_START = 60 * 1000
+
+
+class FixedKeyThrottle(SlidingWindowThrottle):
+    scope = "tests"
+    rate = "4/min"
+    lockout_base = 30
+    lockout_max = 240
+
+    def get_cache_key(self, request, view):
+        return self.format_key("client")
+
+
+class FailureThrottle(FixedKeyThrottle):
+    count_failures_only = True
+
+
+class ThrottleTestCase(TestCase):
+    """Throttles run against a clear cache and a mocked timer()"""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(
+            SlidingWindowThrottle, "timer", mock.Mock(return_value=WINDOW_START)
+        )
+        self.timer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def set_time(self, now):
+        self.timer.return_value = now
+
+
+class SlidingWindowThrottleTests(ThrottleTestCase):
+    def allow(self, throttle_class=FixedKeyThrottle):
+        throttle = throttle_class()
+        return throttle.allow_request(None, None), throttle
+
+    def use_up_rate(self):
+        for _ in range(4):
+            self.assertTrue(self.allow()[0])
+
+    def assert_denied(self, wait, throttle_class=FixedKeyThrottle):
+        allowed, throttle = self.allow(throttle_class)
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), wait)
+
+    def test_rate_within_window(self):
+        self.use_up_rate()
+        self.assert_denied(30)
+
+    def test_previous_window_weighted_by_overlap(self):
+        self.set_time(WINDOW_START + 50)
+        self.use_up_rate()
+
+        # A quarter into the next window: 4 * 0.75 = 3 still count
+        self.set_time(WINDOW_START + 75)
+        self.assertTrue(self.allow()[0])
+        self.assert_denied(30)
+
+    def test_previous_window_fades_out(self):
+        self.set_time(WINDOW_START + 50)
+        self.use_up_rate()
+
+        # Three quarters into the next window: 4 * 0.25 = 1 still counts
+        self.set_time(WINDOW_START + 105)
+        for _ in range(3):
+            self.assertTrue(self.allow()[0])
+        self.assert_denied(30)
+
+    def test_window_rolls_over(self):
+        self.set_time(WINDOW_START + 50)
+        self.use_up_rate()
+
+        # Two windows on, the full windows' counts no longer overlap
+        self.set_time(WINDOW_START + 120)
+        self.use_up_rate()
+
+    def test_lockout_doubles_up_to_max(self):
+        now = WINDOW_START
+        for wait in (30, 60, 120, 240, 240):
+            self.set_time(now)
+            self.use_up_rate()
+            self.assert_denied(wait)
+            now += wait
+
+    def test_lockout_reports_remaining_time(self):
+        self.use_up_rate()
+        self.assert_denied(30)
+
+        self.set_time(WINDOW_START + 10)
+        self.assert_denied(20)
+
+    def test_lockout_expires_with_fresh_window(self):
+        self.use_up_rate()
+        self.assert_denied(30)
+
+        self.set_time(WINDOW_START + 30)
+        self.use_up_rate()
+
+    def test_count_failures_only(self):
+        for _ in range(10):
+            self.assertTrue(self.allow(FailureThrottle)[0])
+
+        for _ in range(4):
+            FailureThrottle().record_failure(None)
+        self.assert_denied(30, FailureThrottle)
+
+
+class LoginUsernameThrottleTests(ThrottleTestCase):
+    def cache_key(self, data):
+        request = Request(
+            APIRequestFactory().post("/", data, format="json"),
+            parsers=[JSONParser()],
+        )
+        return LoginUsernameThrottle().get_cache_key(request, None)
+
+    def test_case_and_whitespace_share_a_key(self):
+        key = self.cache_key({"username": "alice"})
+        self.assertEqual(self.cache_key({"username": "ALICE"}), key)
+        self.assertEqual(self.cache_key({"username": "  Alice\t"}), key)
+        self.assertNotEqual(self.cache_key({"username": "alice2"}), key)
+
+    def test_missing_username_is_not_throttled(self):
+        self.assertIsNone(self.cache_key({}))
+        self.assertIsNone(self.cache_key({"username": "   "}))
+        self.assertIsNone(self.cache_key({"username": ["alice"]}))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LoginThrottleTests(ThrottleTestCase):
+    """The login endpoint with the login_username rate of 5/min"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(
+            username="employee", email="employee@example.com", password="pass-12345"
+        )
+        Employee.objects.create(
+            user=user,
+            name="Employee",
+            phone="0000000000",
+            address="-",
+            emergency_contact="0000000000",
+            salary="1000.00",
+            position="Engineer",
+            join_date=date(2024, 1, 1),
+        )
+
+    def setUp(self):
+        super().setUp()
+        last_login_recorder.clear()
+
+    def tearDown(self):
+        last_login_recorder.clear()
+
+    def login(self, password, username="employee"):
+        return APIClient().post(
+            reverse("token_obtain_pair"),
+            {"username": username, "password": password},
+            format="json",
+        )
+
+    def test_failed_logins_lock_out_username(self):
+        for _ in range(5):
+            self.assertEqual(self.login("wrong").status_code, 401)
+
+        response = self.login("wrong")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+
+        # Locked out before the password is checked
+        response = self.login("pass-12345", username="Employee ")
+        self.assertEqual(response.status_code, 429)
+
+    def test_successful_logins_are_not_counted(self):
+        for _ in range(10):
+            self.assertEqual(self.login("pass-12345").status_code, 200)
+        for _ in range(5):
+            self.assertEqual(self.login("wrong").status_code, 401)
@@ -0,0 +1,162 @@
+"""
+Cache-backed throttles for login and other credential checks
+
+DRF checks throttles before the view runs, so a throttled login costs a
+cache round trip instead of a password hash. Rates come from
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]; a scope set to None is off.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window rate limit with exponential lockout
+
+    The window is approximated from two fixed-window counters, weighting
+    the previous one by how much of it still overlaps the window, so a
+    check is one get_many and an allowed request one incr, whatever the
+    rate. A client over the limit is locked out for THROTTLE_LOCKOUT_BASE
+    seconds, doubling on each repeat up to THROTTLE_LOCKOUT_MAX; strikes
+    are forgotten after THROTTLE_LOCKOUT_MAX without one. A lockout starts
+    a fresh window, so a client that waits out Retry-After gets the full
+    rate again.
+
+    With count_failures_only, allow_request() only checks the counters and
+    the view calls record_failure() for attempts that failed.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+    lockout_base = settings.THROTTLE_LOCKOUT_BASE
+    lockout_max = settings.THROTTLE_LOCKOUT_MAX
+    count_failures_only = False
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f"{self.key}:{window}"
+        previous_key = f"{self.key}:{window - 1}"
+        lockout_key = f"{self.key}:lockout"
+
+        values = self.cache.get_many([lockout_key, current_key, previous_key])
+        locked_until = values.get(lockout_key)
+        if locked_until is not None and locked_until > self.now:
+            self.retry_after = locked_until - self.now
+            return False
+
+        overlap = 1 - (self.now - window * self.duration) / self.duration
+        count = values.get(previous_key, 0) * overlap + values.get(current_key, 0)
+        if count >= self.num_requests:
+            self.cache.delete_many([current_key, previous_key])
+            self.retry_after = self.lock_out(lockout_key)
+            return False
+
+        if not self.count_failures_only:
+            self.increment(current_key)
+        return True
+
+    def record_failure(self, request, view=None):
+        """Count a failed attempt against a count_failures_only throttle"""
+        if self.rate is None:
+            return
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is not None:
+            self.increment(f"{self.key}:{int(self.timer() // self.duration)}")
+
+    def increment(self, window_key):
+        if not self.cache.add(window_key, 1, 2 * self.duration):
+            try:
+                self.cache.incr(window_key)
+            except ValueError:
+                # Expired between add() and incr()
+                self.cache.set(window_key, 1, 2 * self.duration)
+
+    def lock_out(self, lockout_key):
+        """Start a lockout twice as long as the previous one; returns its length"""
+        strikes_key = f"{self.key}:strikes"
+        if self.cache.add(strikes_key, 1, self.lockout_max):
+            strikes = 1
+        else:
+            try:
+                strikes = self.cache.incr(strikes_key)
+            except ValueError:
+                strikes = 1
+            self.cache.touch(strikes_key, self.lockout_max)
+
+        lockout = min(self.lockout_base * 2 ** (strikes - 1), self.lockout_max)
+        self.cache.set(lockout_key, self.now + lockout, lockout)
+        return lockout
+
+    def wait(self):
+        return self.retry_after
+
+    def format_key(self, ident):
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    """Login attempts per client IP"""
+
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.format_key(self.get_ident(request))
+
+
+class LoginUsernameThrottle(SlidingWindowThrottle):
+    """
+    Failed login attempts per username, whichever IPs they come from
+
+    Successful logins are not counted, so a user who logs in often is never
+    locked out, and locking someone else out takes failed guesses that the
+    per-IP throttle also limits.
+    """
+
+    scope = "login_username"
+    count_failures_only = True
+
+    def get_cache_key(self, request, view):
+        username = request.data.get(get_user_model().USERNAME_FIELD)
+        if not isinstance(username, str) or not username.strip():
+            # Rejected by the serializer before any hashing
+            return None
+
+        # Case variants share a counter; hashing keeps keys cache-safe
+        ident = hashlib.sha256(username.strip().casefold().encode()).hexdigest()
+        return self.format_key(ident)
+
+
+class ChangePasswordThrottle(SlidingWindowThrottle):
+    """Password change attempts per user, which each hash the old password"""
+
+    scope = "change_password"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.format_key(request.user.pk)
+        return self.format_key(self.get_ident(request))
+
+
+class VerifyAdminThrottle(SlidingWindowThrottle):
+    """verify_admin calls per API client, or per IP for unknown callers"""
+
+    scope = "verify_admin"
+
+    def get_cache_key(self, request, view):
+        # Set by HasAdminAPIKey, which runs before throttles
+        client = getattr(request, "api_client", None)
+        if client is not None:
+            return self.format_key(f"client-{client.name}")
+        return self.format_key(self.get_ident(request))
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EmployeeViewSet
+from .views import EmployeeViewSet, MetricsView
 
 router = DefaultRouter()
 router.register(r"employees", EmployeeViewSet, basename="employee")
 
 urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("", include(router.urls)),
 ]
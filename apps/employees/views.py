@@ -1,66 +1,160 @@
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .models import Employee
 from .serializers import (
     EmployeeSerializer,
     EmployeeListSerializer,
     ChangePasswordSerializer,
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
+    VerifyAdminBatchSerializer,
+    EMPLOYEE_LIST_FIELDS,
+    employee_list_representation,
 )
 from .permissions import IsAdmin, IsOwnerOrAdmin, HasAdminAPIKey
+from .conditional import (
+    VALIDATOR_FIELDS,
+    get_not_modified_response,
+    is_conditional_request,
+    set_validator_headers,
+)
+from .changes import InvalidWatermark, get_changes
+from .exporting import EXPORT_CONTENT_TYPES, stream_employees
+from .importing import EmployeeImporter, read_uploaded_rows
+from .database import pin_user_to_primary, request_routing, use_replica
+from .filters import EmployeeSearchFilter
+from .hashing import password_hash_pool
+from .metrics import metrics_registry, record_time
+from .pagination import EmployeeCursorPagination, wants_cursor_pagination
+from .cache import get_admin_status, get_admin_statuses
+from .signing import get_jwks
+from .throttling import (
+    ChangePasswordThrottle,
+    LoginIPThrottle,
+    LoginUsernameThrottle,
+    VerifyAdminThrottle,
+)
+
+# Actions whose reads, including permission checks, may use a replica
+REPLICA_READ_ACTIONS = {"list", "retrieve", "me"}
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom token view that includes role in JWT and response"""
 
     serializer_class = CustomTokenObtainPairSerializer
+    # Checked before the serializer, so throttled attempts never hash
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-
-        if response.status_code == 200:
-            # Get the user from request
-            from rest_framework_simplejwt.tokens import RefreshToken
-            from django.contrib.auth import authenticate
-
-            username = request.data.get("username")
-            password = request.data.get("password")
-            user = authenticate(username=username, password=password)
-
-            if user:
-                try:
-                    employee = user.employee
-                    response.data["role"] = employee.role
-                    response.data["name"] = employee.name
-                    response.data["is_admin"] = employee.is_admin
-                except Employee.DoesNotExist:
-                    response.data["role"] = "employee"
-                    response.data["name"] = user.username
-                    response.data["is_admin"] = user.is_staff or user.is_superuser
+        try:
+            return super().post(request, *args, **kwargs)
+        except AuthenticationFailed:
+            LoginUsernameThrottle().record_failure(request, self)
+            raise
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    """Refresh view that re-issues role claims in the new access token"""
 
+    serializer_class = CustomTokenRefreshSerializer
+
+
+class JWKSView(APIView):
+    """Public token signing keys, so other services can verify tokens offline"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        response = Response(get_jwks())
+        response["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE}"
         return response
 
 
+class MetricsView(APIView):
+    """Per-endpoint request metrics of this process, for Prometheus"""
+
+    permission_classes = [HasAdminAPIKey | (IsAuthenticated & IsAdmin)]
+
+    def get(self, request):
+        return HttpResponse(
+            metrics_registry.render(), content_type="text/plain; version=0.0.4"
+        )
+
+
 class EmployeeViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Employee CRUD operations
 
     Endpoints:
     - GET /api/employees/ - List all employees (admin only)
+      (?pagination=cursor for keyset pagination instead of page numbers;
+      filters: ?name= prefix, ?phone=, ?position=, ?role=, ?joined_after=,
+      ?joined_before=)
     - POST /api/employees/ - Create new employee (admin only)
     - GET /api/employees/{id}/ - Retrieve employee (owner or admin)
     - PUT/PATCH /api/employees/{id}/ - Update employee (owner or admin)
     - DELETE /api/employees/{id}/ - Delete employee (admin only)
+    - POST /api/employees/bulk_import/ - Import many employees (admin only)
+    - GET /api/employees/export/ - Stream all employees (admin only)
+    - GET /api/employees/changes/ - Employees changed since a watermark (admin only)
     - GET /api/employees/me/ - Get current user's employee info
     - POST /api/employees/change_password/ - Change password
     - POST /api/employees/verify_admin/ - Verify admin status (with API key)
+    - POST /api/employees/verify_admin_batch/ - Verify many users (with API key)
     """
 
     queryset = Employee.objects.all()
     permission_classes = [IsAuthenticated]
+    filter_backends = [EmployeeSearchFilter]
+
+    def dispatch(self, request, *args, **kwargs):
+        with request_routing():
+            response = super().dispatch(request, *args, **kwargs)
+
+        # Let the writer read its own writes until the replicas catch up
+        user = self.request.user
+        if (
+            self.request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user
+            and user.is_authenticated
+        ):
+            pin_user_to_primary(user.id)
+        return response
+
+    def perform_authentication(self, request):
+        super().perform_authentication(request)
+        # verify_admin opts in from get_admin_status(), on cache misses only
+        if self.action in REPLICA_READ_ACTIONS:
+            use_replica(request.user.id if request.user.is_authenticated else None)
+
+    def get_queryset(self):
+        """Load the user with each employee, and only the columns a list row shows"""
+        queryset = Employee.objects.select_related("user")
+        if self.action == "list":
+            # created_at is read by cursor pagination to build the next cursor
+            return queryset.values(*EMPLOYEE_LIST_FIELDS, "created_at")
+        return queryset
+
+    @property
+    def paginator(self):
+        """Page numbers by default, keyset pagination when the client asks for it"""
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.pagination_class
+            if wants_cursor_pagination(self.request):
+                pagination_class = EmployeeCursorPagination
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -69,13 +163,20 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         """Set permissions based on action"""
-        if self.action in ["create", "destroy", "list"]:
+        if self.action in [
+            "create",
+            "destroy",
+            "list",
+            "bulk_import",
+            "export",
+            "changes",
+        ]:
             # Only admins can create, delete, or list all
             permission_classes = [IsAuthenticated, IsAdmin]
         elif self.action in ["update", "partial_update", "retrieve"]:
             # Owner or admin can update/view
             permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
-        elif self.action == "verify_admin":
+        elif self.action in ["verify_admin", "verify_admin_batch"]:
             # Requires API key
             permission_classes = [HasAdminAPIKey]
         else:
@@ -83,13 +184,61 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    def list(self, request, *args, **kwargs):
+        """List employees from values() rows with the fast list representation"""
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        with record_time("serializer"):
+            data = [employee_list_representation(row) for row in rows]
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an employee, answering conditional requests with 304"""
+        if is_conditional_request(request):
+            # Check permissions and validators on a narrow row first
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            stamp = get_object_or_404(
+                Employee.objects.only(*VALIDATOR_FIELDS),
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+            )
+            self.check_object_permissions(request, stamp)
+            not_modified = get_not_modified_response(request, stamp)
+            if not_modified is not None:
+                return not_modified
+
+            employee = get_object_or_404(self.get_queryset(), pk=stamp.pk)
+        else:
+            employee = self.get_object()
+
+        with record_time("serializer"):
+            data = self.get_serializer(employee).data
+        return set_validator_headers(Response(data), employee)
+
     @action(detail=False, methods=["get"])
     def me(self, request):
         """Get current authenticated user's employee information"""
         try:
-            employee = request.user.employee
-            serializer = self.get_serializer(employee)
-            return Response(serializer.data)
+            if is_conditional_request(request):
+                # Revalidate from a narrow query before loading the profile
+                stamp = Employee.objects.only(*VALIDATOR_FIELDS).get(
+                    user_id=request.user.id
+                )
+                not_modified = get_not_modified_response(request, stamp)
+                if not_modified is not None:
+                    return not_modified
+
+            # Look up by id so stateless token users work without a User row
+            employee = Employee.objects.select_related("user").get(
+                user_id=request.user.id
+            )
+            with record_time("serializer"):
+                data = self.get_serializer(employee).data
+            return set_validator_headers(Response(data), employee)
         except Employee.DoesNotExist:
             return Response(
                 {"error": "Employee profile not found"},
@@ -97,6 +246,96 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=False, methods=["post"])
+    def bulk_import(self, request):
+        """
+        Create many employees at once
+
+        Accepts a JSON list of rows (or {"employees": [...]}), or a CSV or
+        JSON Lines upload in the "file" field. Pass ?unusable_passwords=true
+        to create invite-only accounts. Rows use the employee fields plus
+        username, email and an optional password.
+
+        Response:
+        {
+            "created": 2,
+            "failed": 1,
+            "errors": [{"row": 3, "errors": {"username": ["..."]}}]
+        }
+        """
+        if "file" in request.FILES:
+            rows = read_uploaded_rows(request.FILES["file"])
+        else:
+            rows = request.data
+            if not isinstance(rows, list):
+                rows = rows.get("employees")
+            if not isinstance(rows, list):
+                return Response(
+                    {"error": "A list of employees or a file is required"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        unusable_passwords = request.query_params.get("unusable_passwords") in (
+            "1",
+            "true",
+        )
+        importer = EmployeeImporter(
+            chunk_size=settings.EMPLOYEE_IMPORT_CHUNK_SIZE,
+            unusable_passwords=unusable_passwords,
+            hash_pool=password_hash_pool,
+        )
+        return Response(importer.run(rows))
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream every employee with the list fields, for directory syncs
+
+        ?output=ndjson (default) returns one JSON object per line,
+        ?output=csv returns CSV with a header row.
+        """
+        fmt = request.query_params.get("output", "ndjson")
+        if fmt not in EXPORT_CONTENT_TYPES:
+            return Response(
+                {"error": "output must be one of: ndjson, csv"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        response = StreamingHttpResponse(
+            stream_employees(fmt), content_type=EXPORT_CONTENT_TYPES[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="employees.{fmt}"'
+        return response
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Delta sync: employees changed or deleted since ?since=<watermark>
+
+        Omit "since" for the first sync. Keep calling with next_watermark
+        while has_more is true. Changes show up EMPLOYEE_CHANGES_SAFETY_LAG
+        seconds after they are made, and deletions are kept for
+        EMPLOYEE_TOMBSTONE_RETENTION_DAYS; sync at least that often.
+
+        Response:
+        {
+            "changed": [{"id": 1, "username": "john", ...}],
+            "deleted": [{"id": 2, "user_id": 3, "username": "jane", ...}],
+            "next_watermark": "eyJ1cGRhdGVkIjog...",
+            "has_more": false
+        }
+        """
+        try:
+            return Response(
+                get_changes(
+                    request.query_params.get("since"),
+                    limit=settings.EMPLOYEE_CHANGES_PAGE_SIZE,
+                    safety_lag=settings.EMPLOYEE_CHANGES_SAFETY_LAG,
+                )
+            )
+        except InvalidWatermark as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=["post"], throttle_classes=[ChangePasswordThrottle])
     def change_password(self, request):
         """Change current user's password"""
         serializer = ChangePasswordSerializer(
@@ -111,7 +350,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=["post"], permission_classes=[HasAdminAPIKey])
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[HasAdminAPIKey],
+        throttle_classes=[VerifyAdminThrottle],
+    )
     def verify_admin(self, request):
         """
         Verify admin status for external services
@@ -140,22 +384,61 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            if user_id:
-                employee = Employee.objects.get(user_id=user_id)
-            else:
-                employee = Employee.objects.get(user__username=username)
-
-            return Response(
-                {
-                    "is_admin": employee.is_admin,
-                    "user_id": employee.user.id,
-                    "username": employee.user.username,
-                    "role": employee.role,
-                    "name": employee.name,
-                }
-            )
-        except Employee.DoesNotExist:
+        result = get_admin_status(user_id=user_id, username=username)
+        if result is None:
             return Response(
                 {"error": "Employee not found"}, status=status.HTTP_404_NOT_FOUND
             )
+
+        return Response(result)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[HasAdminAPIKey],
+        throttle_classes=[VerifyAdminThrottle],
+    )
+    def verify_admin_batch(self, request):
+        """
+        Verify admin status for many users in one request
+        Requires X-API-Key header with valid admin API key
+
+        Request body:
+        {
+            "user_ids": [1, 2],
+            "usernames": ["john"]
+        }
+
+        Response:
+        {
+            "user_ids": {
+                "1": {"is_admin": true, "user_id": 1, ...},
+                "2": {"error": "Employee not found"}
+            },
+            "usernames": {
+                "john": {"is_admin": true, "user_id": 1, ...}
+            }
+        }
+        """
+        serializer = VerifyAdminBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        by_id, by_username = get_admin_statuses(
+            serializer.validated_data["user_ids"],
+            serializer.validated_data["usernames"],
+        )
+        not_found = {"error": "Employee not found"}
+
+        return Response(
+            {
+                "user_ids": {
+                    str(user_id): result or not_found
+                    for user_id, result in by_id.items()
+                },
+                "usernames": {
+                    username: result or not_found
+                    for username, result in by_username.items()
+                },
+            }
+        )
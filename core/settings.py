@@ -1,6 +1,10 @@
+import json
+import os
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
+import django
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -22,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.employees.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -54,6 +59,8 @@ TEMPLATES = [
 WSGI_APPLICATION = "core.wsgi.application"
 
 # Database
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse when DB_CONN_HEALTH_CHECKS is on
 DATABASES = {
     "default": {
         "ENGINE": config("DB_ENGINE", default="django.db.backends.sqlite3"),
@@ -62,6 +69,78 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD", default=""),
         "HOST": config("DB_HOST", default=""),
         "PORT": config("DB_PORT", default=""),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        "OPTIONS": {},
+    }
+}
+
+# psycopg 3 connection pool for PostgreSQL (needs Django 5.1+ and
+# psycopg[pool]); replaces persistent connections, so CONN_MAX_AGE is 0
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+if DB_POOL and "postgresql" in DATABASES["default"]["ENGINE"]:
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured(
+            "DB_POOL needs Django 5.1 or later; use persistent connections "
+            "(DB_CONN_MAX_AGE) or PgBouncer instead"
+        )
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=int),
+    }
+
+# Read replicas, as "replica1", "replica2", ... copying the default database
+# with HOST from DB_REPLICA_HOSTS and/or NAME from DB_REPLICA_NAMES (a file
+# path for SQLite). Directory reads (list, retrieve, me, verify_admin) use
+# them, by "round_robin" or "least_lag" (skipping replicas more than
+# DB_REPLICA_MAX_LAG seconds behind). A user who wrote reads from the
+# primary for DB_REPLICA_PIN_SECONDS; keep it above the usual lag.
+DB_REPLICA_HOSTS = config("DB_REPLICA_HOSTS", default="", cast=Csv())
+DB_REPLICA_NAMES = config("DB_REPLICA_NAMES", default="", cast=Csv())
+DB_REPLICAS = []
+for _index in range(max(len(DB_REPLICA_HOSTS), len(DB_REPLICA_NAMES))):
+    _alias = f"replica{_index + 1}"
+    DATABASES[_alias] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # Tests run against the primary alone
+        "TEST": {"MIRROR": "default"},
+    }
+    if _index < len(DB_REPLICA_HOSTS):
+        DATABASES[_alias]["HOST"] = DB_REPLICA_HOSTS[_index]
+    if _index < len(DB_REPLICA_NAMES):
+        DATABASES[_alias]["NAME"] = DB_REPLICA_NAMES[_index]
+    DB_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["apps.employees.database.PrimaryReplicaRouter"]
+DB_REPLICA_SELECTION = config("DB_REPLICA_SELECTION", default="round_robin")
+DB_REPLICA_PIN_SECONDS = config("DB_REPLICA_PIN_SECONDS", default=5, cast=int)
+DB_REPLICA_MAX_LAG = config("DB_REPLICA_MAX_LAG", default=5, cast=float)
+DB_REPLICA_LAG_CHECK_INTERVAL = config(
+    "DB_REPLICA_LAG_CHECK_INTERVAL", default=2, cast=float
+)
+
+# PRAGMAs run on every new SQLite connection (apps/employees/database.py):
+# WAL lets reads run alongside a write, synchronous=NORMAL is durable under
+# WAL except on power loss, and busy_timeout (ms) waits out the write lock
+SQLITE_PRAGMAS = {
+    "journal_mode": config("SQLITE_JOURNAL_MODE", default="wal"),
+    "synchronous": config("SQLITE_SYNCHRONOUS", default="normal"),
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int),
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int),
+}
+
+AUTHENTICATION_BACKENDS = ["apps.employees.backends.EmployeeModelBackend"]
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
     }
 }
 
@@ -75,6 +154,38 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Password hashing: PASSWORD_HASHER (argon2, scrypt or pbkdf2) makes new
+# hashes; the others only verify, and their hashes are upgraded on login
+PASSWORD_HASHER = config("PASSWORD_HASHER", default="argon2")
+_PASSWORD_HASHERS = {
+    "argon2": "apps.employees.hashers.TunedArgon2PasswordHasher",
+    "scrypt": "apps.employees.hashers.TunedScryptPasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+# One core per hash; concurrency comes from the hashing pool instead
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=2, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=19456, cast=int)
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=1, cast=int)
+SCRYPT_WORK_FACTOR = config("SCRYPT_WORK_FACTOR", default=2**16, cast=int)
+SCRYPT_BLOCK_SIZE = config("SCRYPT_BLOCK_SIZE", default=8, cast=int)
+SCRYPT_PARALLELISM = config("SCRYPT_PARALLELISM", default=1, cast=int)
+
+# Logins, password changes and new accounts hash in a pool of
+# PASSWORD_HASH_PROCESSES per web process. Past PASSWORD_HASH_MAX_PENDING
+# queued or running hashes, logins get a 503 right away instead of queueing.
+# With several web workers per host, keep workers * processes near the cores.
+PASSWORD_HASH_PROCESSES = config(
+    "PASSWORD_HASH_PROCESSES", default=os.cpu_count() or 1, cast=int
+)
+PASSWORD_HASH_MAX_PENDING = config(
+    "PASSWORD_HASH_MAX_PENDING", default=4 * PASSWORD_HASH_PROCESSES, cast=int
+)
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -84,21 +195,62 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Stateless authorization: trust the signed role claims instead of loading
+# the user and employee rows. Claims older than JWT_CLAIMS_MAX_AGE are
+# re-checked against the database, which bounds how long role changes lag.
+JWT_STATELESS_AUTH = config("JWT_STATELESS_AUTH", default=False, cast=bool)
+JWT_CLAIMS_MAX_AGE = timedelta(
+    seconds=config("JWT_CLAIMS_MAX_AGE", default=300, cast=int)
+)
+
+# Verified access tokens and their users are cached per process for
+# TOKEN_AUTH_LOCAL_CACHE_TTL seconds, so repeat requests skip the signature
+# check and the user query; deactivation or a password change reaches other
+# processes within that TTL. TOKEN_AUTH_SHARED_CACHE also shares them through
+# the default cache (use Redis/Memcached) for TOKEN_AUTH_SHARED_CACHE_TIMEOUT.
+TOKEN_AUTH_CACHE = config("TOKEN_AUTH_CACHE", default=True, cast=bool)
+TOKEN_AUTH_LOCAL_CACHE_SIZE = config(
+    "TOKEN_AUTH_LOCAL_CACHE_SIZE", default=10000, cast=int
+)
+TOKEN_AUTH_LOCAL_CACHE_TTL = config("TOKEN_AUTH_LOCAL_CACHE_TTL", default=10, cast=int)
+TOKEN_AUTH_SHARED_CACHE = config("TOKEN_AUTH_SHARED_CACHE", default=False, cast=bool)
+TOKEN_AUTH_SHARED_CACHE_TIMEOUT = config(
+    "TOKEN_AUTH_SHARED_CACHE_TIMEOUT", default=300, cast=int
+)
+
+if JWT_STATELESS_AUTH:
+    _AUTHENTICATION_CLASS = "apps.employees.authentication.JWTClaimsAuthentication"
+elif TOKEN_AUTH_CACHE:
+    _AUTHENTICATION_CLASS = "apps.employees.authentication.CachedJWTAuthentication"
+else:
+    _AUTHENTICATION_CLASS = "rest_framework_simplejwt.authentication.JWTAuthentication"
+
 # REST Framework settings
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": (_AUTHENTICATION_CLASS,),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # Scopes of apps.employees.throttling; None turns a scope off
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": config("THROTTLE_LOGIN_IP", default="30/min"),
+        "login_username": config("THROTTLE_LOGIN_USERNAME", default="5/min"),
+        "change_password": config("THROTTLE_CHANGE_PASSWORD", default="5/min"),
+        "verify_admin": config("THROTTLE_VERIFY_ADMIN", default=None),
+    },
 }
+# Clients over a throttle rate are locked out for THROTTLE_LOCKOUT_BASE
+# seconds, doubling on every repeat up to THROTTLE_LOCKOUT_MAX
+THROTTLE_LOCKOUT_BASE = config("THROTTLE_LOCKOUT_BASE", default=30, cast=int)
+THROTTLE_LOCKOUT_MAX = config("THROTTLE_LOCKOUT_MAX", default=3600, cast=int)
 
 # JWT settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
-    "ROTATE_REFRESH_TOKENS": False,
+    # Used refresh tokens are revoked by apps.employees.revocation instead of
+    # simplejwt's token_blacklist app, so BLACKLIST_AFTER_ROTATION stays off
+    "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": False,
     "UPDATE_LAST_LOGIN": True,
     "ALGORITHM": "HS256",
@@ -110,6 +262,18 @@ SIMPLE_JWT = {
     "TOKEN_TYPE_CLAIM": "token_type",
 }
 
+# Asymmetric signing: when JWT_KEYS_DIR is set, tokens are signed with the
+# RS256/EdDSA key JWT_ACTIVE_KID instead of the HS256 SIGNING_KEY above, and
+# all public keys are served at /.well-known/jwks.json (see
+# apps/employees/signing.py for the rotation steps)
+JWT_KEYS_DIR = config("JWT_KEYS_DIR", default="")
+JWT_ACTIVE_KID = config("JWT_ACTIVE_KID", default="")
+JWKS_MAX_AGE = config("JWKS_MAX_AGE", default=86400, cast=int)
+
+# Serve login, refresh, /me/ and verify_admin from the native async views in
+# apps/employees/async_views.py; only worth it under an ASGI server
+ASYNC_AUTH_VIEWS = config("ASYNC_AUTH_VIEWS", default=False, cast=bool)
+
 # CORS settings (adjust for production)
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 CORS_ALLOWED_ORIGINS = [
@@ -117,5 +281,107 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
-# Admin API Key for external services
+# Bulk employee import: rows per transaction, and password hashing processes
+# for manage.py import_employees (0 or 1 hashes inline); the endpoint hashes
+# in the shared PASSWORD_HASH_PROCESSES pool
+EMPLOYEE_IMPORT_CHUNK_SIZE = config("EMPLOYEE_IMPORT_CHUNK_SIZE", default=500, cast=int)
+EMPLOYEE_IMPORT_WORKERS = config(
+    "EMPLOYEE_IMPORT_WORKERS", default=os.cpu_count() or 1, cast=int
+)
+
+# Rows fetched per round trip when streaming /api/employees/export/
+EMPLOYEE_EXPORT_CHUNK_SIZE = config(
+    "EMPLOYEE_EXPORT_CHUNK_SIZE", default=2000, cast=int
+)
+
+# Maximum changed and deleted rows per /api/employees/changes/ response
+EMPLOYEE_CHANGES_PAGE_SIZE = config("EMPLOYEE_CHANGES_PAGE_SIZE", default=500, cast=int)
+
+# /api/employees/changes/ only returns rows saved at least this many seconds
+# ago, so transactions still in flight cannot commit behind a watermark.
+# Keep it above the longest transaction that saves employees.
+EMPLOYEE_CHANGES_SAFETY_LAG = config("EMPLOYEE_CHANGES_SAFETY_LAG", default=5, cast=int)
+
+# Deleted employees are reported to delta syncs for this many days, until
+# manage.py prune_employee_tombstones removes them (run it daily from cron)
+EMPLOYEE_TOMBSTONE_RETENTION_DAYS = config(
+    "EMPLOYEE_TOMBSTONE_RETENTION_DAYS", default=30, cast=int
+)
+
+# Logins buffer last_login in memory and write it with one bulk UPDATE every
+# LAST_LOGIN_FLUSH_INTERVAL seconds (the most it lags), or sooner once
+# LAST_LOGIN_FLUSH_SIZE users are pending; 0 writes on every login
+LAST_LOGIN_FLUSH_INTERVAL = config("LAST_LOGIN_FLUSH_INTERVAL", default=30, cast=int)
+LAST_LOGIN_FLUSH_SIZE = config("LAST_LOGIN_FLUSH_SIZE", default=500, cast=int)
+
+# Revoked refresh token jtis remembered per process before asking the cache
+REVOKED_TOKEN_LOCAL_CACHE_SIZE = config(
+    "REVOKED_TOKEN_LOCAL_CACHE_SIZE", default=10000, cast=int
+)
+
+# Where used refresh tokens are recorded: "database" inserts a RevokedToken
+# row per refresh and prunes expired rows every REVOKED_TOKEN_PRUNE_INTERVAL
+# seconds (0 leaves it to manage.py prune_revoked_tokens from cron);
+# "cache" writes no rows but needs a shared Redis/Memcached cache, and a
+# used token can be replayed if the cache loses its entry
+REVOKED_TOKEN_STORE = config("REVOKED_TOKEN_STORE", default="database")
+if REVOKED_TOKEN_STORE not in ("database", "cache"):
+    raise ImproperlyConfigured('REVOKED_TOKEN_STORE must be "database" or "cache"')
+REVOKED_TOKEN_PRUNE_INTERVAL = config(
+    "REVOKED_TOKEN_PRUNE_INTERVAL", default=3600, cast=int
+)
+
+# Admin API Key for external services. Prefer one key per service from
+# manage.py create_api_client; set this to "" once every caller has moved.
 ADMIN_API_KEY = config("ADMIN_API_KEY", default="change-this-secure-key")
+
+# API clients are cached per process for API_CLIENT_CACHE_TTL seconds, which
+# bounds how long a revoked key keeps working in other processes, and unknown
+# key prefixes for API_CLIENT_NEGATIVE_CACHE_TTL. Request counts are written
+# every FLUSH_INTERVAL seconds, or sooner after FLUSH_SIZE requests.
+API_CLIENT_CACHE_SIZE = config("API_CLIENT_CACHE_SIZE", default=256, cast=int)
+API_CLIENT_CACHE_TTL = config("API_CLIENT_CACHE_TTL", default=60, cast=int)
+API_CLIENT_NEGATIVE_CACHE_SIZE = config(
+    "API_CLIENT_NEGATIVE_CACHE_SIZE", default=64, cast=int
+)
+API_CLIENT_NEGATIVE_CACHE_TTL = config(
+    "API_CLIENT_NEGATIVE_CACHE_TTL", default=5, cast=int
+)
+API_CLIENT_STATS_FLUSH_SIZE = config(
+    "API_CLIENT_STATS_FLUSH_SIZE", default=1000, cast=int
+)
+API_CLIENT_STATS_FLUSH_INTERVAL = config(
+    "API_CLIENT_STATS_FLUSH_INTERVAL", default=60, cast=int
+)
+
+# verify_admin result cache: a per-process LRU in front of the shared cache
+VERIFY_ADMIN_CACHE_TIMEOUT = config("VERIFY_ADMIN_CACHE_TIMEOUT", default=300, cast=int)
+VERIFY_ADMIN_LOCAL_CACHE_SIZE = config(
+    "VERIFY_ADMIN_LOCAL_CACHE_SIZE", default=1024, cast=int
+)
+VERIFY_ADMIN_LOCAL_CACHE_TTL = config(
+    "VERIFY_ADMIN_LOCAL_CACHE_TTL", default=5, cast=int
+)
+VERIFY_ADMIN_BATCH_MAX_SIZE = config(
+    "VERIFY_ADMIN_BATCH_MAX_SIZE", default=100, cast=int
+)
+
+# Per-endpoint timing and query counts, served at /api/metrics/. Endpoints
+# are "ViewSet.action", the APIView class or "module.function"; a request
+# over its budget (wall time in ms, database queries) logs a warning.
+# REQUEST_BUDGETS from the environment is a JSON object merged over these.
+REQUEST_METRICS = config("REQUEST_METRICS", default=True, cast=bool)
+REQUEST_BUDGETS = {
+    "CustomTokenObtainPairView": {"ms": 500, "queries": 3},
+    "CustomTokenRefreshView": {"ms": 100, "queries": 3},
+    "EmployeeViewSet.list": {"ms": 250, "queries": 4},
+    "EmployeeViewSet.retrieve": {"ms": 100, "queries": 3},
+    "EmployeeViewSet.me": {"ms": 100, "queries": 2},
+    # verify_admin: the employee, plus the API client on a cold key cache
+    "EmployeeViewSet.verify_admin": {"ms": 50, "queries": 2},
+    "async_views.login": {"ms": 500, "queries": 3},
+    "async_views.refresh": {"ms": 100, "queries": 2},
+    "async_views.me": {"ms": 100, "queries": 1},
+    "async_views.verify_admin": {"ms": 50, "queries": 2},
+    **config("REQUEST_BUDGETS", default="{}", cast=json.loads),
+}
@@ -1,15 +1,41 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenRefreshView
-from apps.employees.views import CustomTokenObtainPairView
+from apps.employees import async_views
+from apps.employees.views import (
+    CustomTokenObtainPairView,
+    CustomTokenRefreshView,
+    JWKSView,
+)
+
+if settings.ASYNC_AUTH_VIEWS:
+    # Native async views for the hot auth and verification paths, matched
+    # before the DRF router
+    auth_urlpatterns = [
+        path("api/auth/login/", async_views.login, name="token_obtain_pair"),
+        path("api/auth/refresh/", async_views.refresh, name="token_refresh"),
+        path("api/employees/me/", async_views.me),
+        path("api/employees/verify_admin/", async_views.verify_admin),
+    ]
+else:
+    auth_urlpatterns = [
+        path(
+            "api/auth/login/",
+            CustomTokenObtainPairView.as_view(),
+            name="token_obtain_pair",
+        ),
+        path(
+            "api/auth/refresh/",
+            CustomTokenRefreshView.as_view(),
+            name="token_refresh",
+        ),
+    ]
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     # Authentication endpoints
-    path(
-        "api/auth/login/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"
-    ),
-    path("api/auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    *auth_urlpatterns,
+    path(".well-known/jwks.json", JWKSView.as_view(), name="jwks"),
     # Employee endpoints
     path("api/", include("apps.employees.urls")),
 ]